@@ -1,17 +1,35 @@
 import asyncio
+import contextvars
 import json
+import logging
 import random
+import time
 from pathlib import Path
 from datetime import datetime, timedelta
-import pandas as pd
-import padroes
+import lacunas
+import mercados
+import metricas
+import particoes
+import persistencia
+import rede
+import registro
 from playwright.async_api import async_playwright
 
+try:
+    import psutil  # Opcional: RSS dos processos do browser
+except ImportError:
+    psutil = None
+
+# Logs estruturados (fila + thread escritora, ver registro.py); configurado no ponto de entrada
+log = logging.getLogger("bet")
+
+# Dia da lista aberta por cada worker (task): após a meia-noite o worker segue na lista
+# do dia anterior até drená-la, inclusive quando a página é recuperada ou reciclada
+dia_lista = contextvars.ContextVar("dia_lista", default=None)
+
 # ==========================
 ROOT = Path(__file__).resolve().parent
 CONFIG_PATH = ROOT / "config.json"
-ANCHOR_DIR = ROOT / "anchor_time"
-ANCHOR_DIR.mkdir(exist_ok=True)
 
 # Valores Padrão
 config = {
@@ -24,7 +42,20 @@ config = {
     "POLLING_INTERVAL": 30,
     "CONSECUTIVE_NONE_LIMIT": 1,
     "REST_TIME": 30,
-    "LOOKBACK_HOURS": 1
+    "LOOKBACK_HOURS": 1,
+    "RECOVERY_TIMEOUT": 10,
+    "LOOP_LAG_THRESHOLD": 0.25,
+    "WORKER_PROCESSES": 1,
+    "SESSION_CHECK_TIMEOUT": 15,
+    "RECYCLE_MAX_NAVIGATIONS": 500,
+    "RECYCLE_MAX_JS_HEAP_MB": 300,
+    "RECYCLE_MAX_RSS_MB": 0,
+    "MEMORY_CHECK_INTERVAL": 60,
+    "RECOLETA_MAX_TENTATIVAS": 3,
+    "MERCADOS": ["Ambos Marcam"],
+    "CAPTURA_REDE": False,
+    "CAPTURA_REDE_URL": "result",
+    "CAPTURA_REDE_TIMEOUT": 3
 }
 
 # Carregar do arquivo se existir
@@ -45,14 +76,17 @@ if "COMPETITIONS" in config:
 USERNAME = config.get("USERNAME", "")
 PASSWORD = config.get("PASSWORD", "")
 
-if not USERNAME or not PASSWORD:
-    print("⚠️ Credenciais não encontradas ou vazias no config.json")
-    if not USERNAME:
-        USERNAME = input("Digite o usuário Bet365: ")
-    if not PASSWORD:
-        PASSWORD = input("Digite a senha Bet365: ")
-else:
-    print(f"✅ Credenciais carregadas do config.json (Usuário: {USERNAME})")
+def garantir_credenciais():
+    # Chamado apenas no processo principal (os processos de shard não fazem login)
+    global USERNAME, PASSWORD
+    if not USERNAME or not PASSWORD:
+        print("⚠️ Credenciais não encontradas ou vazias no config.json")
+        if not USERNAME:
+            USERNAME = input("Digite o usuário Bet365: ")
+        if not PASSWORD:
+            PASSWORD = input("Digite a senha Bet365: ")
+    else:
+        print(f"✅ Credenciais carregadas do config.json (Usuário: {USERNAME})")
 
 
 TARGET_URL = config["TARGET_URL"]
@@ -64,6 +98,36 @@ POLLING_INTERVAL = config.get("POLLING_INTERVAL", 60)
 CONSECUTIVE_NONE_LIMIT = config.get("CONSECUTIVE_NONE_LIMIT", 1)
 REST_TIME = config.get("REST_TIME", 120)
 LOOKBACK_HOURS = config.get("LOOKBACK_HOURS", 5)
+RECOVERY_TIMEOUT = config.get("RECOVERY_TIMEOUT", 10)
+LOOP_LAG_THRESHOLD = config.get("LOOP_LAG_THRESHOLD", 0.25)
+WORKER_PROCESSES = config.get("WORKER_PROCESSES", 1)
+SESSION_CHECK_TIMEOUT = config.get("SESSION_CHECK_TIMEOUT", 15)
+
+# Reciclagem de páginas (0 desativa o limite)
+RECYCLE_MAX_NAVIGATIONS = config.get("RECYCLE_MAX_NAVIGATIONS", 500)
+RECYCLE_MAX_JS_HEAP_MB = config.get("RECYCLE_MAX_JS_HEAP_MB", 300)
+RECYCLE_MAX_RSS_MB = config.get("RECYCLE_MAX_RSS_MB", 0)
+MEMORY_CHECK_INTERVAL = config.get("MEMORY_CHECK_INTERVAL", 60)
+
+# Recoleta de lacunas: tentativas antes de desistir de um jogo
+RECOLETA_MAX_TENTATIVAS = config.get("RECOLETA_MAX_TENTATIVAS", 3)
+
+# Mercados lidos em cada visita ao jogo (Ambos Marcam sempre incluído), ver mercados.py
+MERCADOS = mercados.normalizar(config.get("MERCADOS"))
+
+# Captura dos resultados pelas respostas de rede da página (opcional, DOM como fallback), ver rede.py
+CAPTURA_REDE = config.get("CAPTURA_REDE", False)
+CAPTURA_REDE_URL = config.get("CAPTURA_REDE_URL", "result")
+CAPTURA_REDE_TIMEOUT = config.get("CAPTURA_REDE_TIMEOUT", 3)
+
+# Sessão autenticada exportada pelo processo principal (storage state do Playwright)
+SESSION_DIR = ROOT / "sessao"
+STORAGE_STATE_PATH = SESSION_DIR / "storage_state.json"
+
+# Tempo de inicialização: do lançamento até o primeiro resultado extraído
+INICIO_EXECUCAO = time.time()
+MODO_SESSAO = "login"
+_primeiro_resultado = False
 
 # Mapeamento de competições
 competitions_map = {
@@ -73,34 +137,11 @@ competitions_map = {
     "Copa do Mundo": "#CompetitionList > div:nth-child(8) > button > div"
 }
 
-# Lock global para escrita no CSV
-csv_lock = asyncio.Lock()
-
-# --- Anchor Time Helpers ---
-def get_anchor_filename():
-    return ANCHOR_DIR / f"anchor_time_{datetime.now().strftime('%Y-%m-%d')}.json"
-
-def load_anchor_time(comp_name):
-    f = get_anchor_filename()
-    if f.exists():
-        try:
-            with open(f, 'r') as fp:
-                data = json.load(fp)
-                return data.get(comp_name)
-        except: return None
-    return None
-
-def save_anchor_time(comp_name, time_str):
-    f = get_anchor_filename()
-    data = {}
-    if f.exists():
-        try:
-            with open(f, 'r') as fp:
-                data = json.load(fp)
-        except: pass
-    data[comp_name] = time_str
-    with open(f, 'w') as fp:
-        json.dump(data, fp, indent=4)
+# Seletores de estado da navegação
+LOGIN_BTN_SELECTOR = '#logged-out-container > div.mobileLoginSection > a'
+LOGGED_IN_SELECTOR = '.hm-MainHeaderMembers'  # cabeçalho de membro (usuário logado)
+MATCHES_CONTAINER_SELECTOR = "#ResultsComponent > div:nth-child(3) > div"
+COMPETITION_LIST_SELECTOR = "#CompetitionList"
 
 def time_str_to_minutes(t_str):
     try:
@@ -118,58 +159,6 @@ async def wait_random():
     delay = random.uniform(DELAY_MIN, DELAY_MAX)
     await asyncio.sleep(delay)
 
-async def save_match_data(comp_name, date_str, hour, minute, ambos_marcam, csv_path):
-    async with csv_lock:
-        try:
-            match_info_dict = {
-                "Data": date_str,
-                "Competição": comp_name,
-                "Hora": hour,
-                "Minuto": minute,
-                "Ambos Marcam": ambos_marcam
-            }
-            
-            if csv_path.exists():
-                df_current = pd.read_csv(csv_path)
-                df_current['Hora'] = df_current['Hora'].astype(str)
-                df_current['Minuto'] = df_current['Minuto'].astype(str)
-            else:
-                df_current = pd.DataFrame(columns=["Data", "Competição", "Hora", "Minuto", "Ambos Marcam"])
-
-            # Verifica se já existe (chave: Competição, Hora, Minuto)
-            mask = (
-                (df_current['Competição'] == comp_name) &
-                (df_current['Hora'].astype(str) == str(hour)) &
-                (df_current['Minuto'].astype(str) == str(minute))
-            )
-            
-            if mask.any():
-                # Atualiza se o valor novo não for nulo/vazio
-                if ambos_marcam:
-                    df_current.loc[mask, 'Ambos Marcam'] = ambos_marcam
-                else:
-                    pass # Se ambos_marcam for None, não sobrescreve dados existentes
-            else:
-                new_row = pd.DataFrame([match_info_dict])
-                df_current = pd.concat([df_current, new_row], ignore_index=True)
-                if ambos_marcam:
-                    print(f"     [{comp_name}] 💾 Salvo no CSV: {hour:02d}:{minute:02d} - {ambos_marcam}")
-                else:
-                    # print(f"     [{comp_name}] 💾 Jogo registrado: {hour:02d}:{minute:02d}")
-                    pass
-
-            # Calcular padrões em memória antes de salvar (apenas se tivermos dados novos de resultado)
-            if ambos_marcam:
-                try:
-                    df_current = padroes.calcular_padroes(df_current)
-                except Exception as e_patt:
-                    print(f"     ⚠️ Erro ao calcular padrões: {e_patt}")
-
-            df_current.to_csv(csv_path, index=False, encoding='utf-8-sig')
-            
-        except Exception as e:
-            print(f"     [{comp_name}] ❌ Erro ao salvar CSV: {e}")
-
 async def extract_ambos_marcam_logic(page):
     ambos_marcam = ""
     clicked_ambos = False
@@ -248,70 +237,341 @@ async def extract_ambos_marcam_logic(page):
 
     return ""
 
+async def extrair_resultado(page, captura=None, marca=0):
+    """
+    Lê todos os mercados configurados do jogo aberto. Com captura de rede, usa as
+    respostas chegadas depois de `marca` (captura.marcar() antes do clique); senão, ou se
+    a rede não trouxer o resultado, lê o painel numa única passada. Se o mercado
+    "Ambos Marcam" não for achado pelo título, cai na extração antiga por seletores.
+    Retorna {coluna: valor}.
+    """
+    inicio = time.monotonic()
+    if captura is not None:
+        valores = await captura.mercados(marca, MERCADOS, CAPTURA_REDE_TIMEOUT)
+        if valores:
+            metricas.registrar_evento("extracao", duracao=time.monotonic() - inicio, fonte="rede")
+            return valores
+
+    valores, encontrados = await mercados.extrair(page, MERCADOS)
+    if mercados.PRINCIPAL not in encontrados:
+        res = await extract_ambos_marcam_logic(page)
+        if res:
+            valores[mercados.PRINCIPAL] = res
+    metricas.registrar_evento("extracao", duracao=time.monotonic() - inicio, fonte="dom")
+    return valores
+
+async def horarios_da_rede(captura, botoes, count):
+    """
+    Horários da lista de jogos pela última resposta de rede (modo CAPTURA_REDE), na ordem
+    dos botões. Só vale se a contagem bater e o primeiro e o último botão mostrarem os
+    mesmos horários; senão retorna None e a lista é lida do DOM botão a botão.
+    """
+    if captura is None:
+        return None
+    jogos = captura.jogos()
+    if not jogos or len(jogos) != count:
+        return None
+    try:
+        for i in {0, count - 1}:
+            texto = await botoes.nth(i).inner_text()
+            h, m = jogos[i]
+            if f"{h:02d}.{m:02d}" not in texto and f"{h:02d}:{m:02d}" not in texto:
+                return None
+    except Exception:
+        return None
+    return jogos
+
+async def aguardar_visivel(page, selector, timeout):
+    """
+    Espera o seletor ficar visível (timeout em segundos). Retorna True/False em vez de levantar exceção.
+    """
+    try:
+        await page.locator(selector).first.wait_for(state="visible", timeout=timeout * 1000)
+        return True
+    except:
+        return False
+
+async def selecionar_competicao(page, comp_name):
+    comp_selector = competitions_map.get(comp_name)
+    if comp_selector and await page.is_visible(comp_selector):
+        await page.click(comp_selector)
+        return True
+    search_name = comp_name
+    if comp_name == "Sul Americano": search_name = "Super Liga Sul-Americana"
+    c_btn = page.locator(COMPETITION_LIST_SELECTOR).get_by_text(search_name).first
+    if await c_btn.is_visible():
+        await c_btn.click()
+        return True
+    return False
+
 async def navigate_to_competition(page, comp_name):
     try:
         await page.goto(TARGET_URL, wait_until="domcontentloaded", timeout=60000)
-        await wait_random()
         
         # 1. Encontrar Resultado
         find_result_selector = '#ResultsComponent > div.home-page__inner > button > div'
-        if await page.is_visible(find_result_selector):
+        if await aguardar_visivel(page, find_result_selector, RECOVERY_TIMEOUT):
             await page.click(find_result_selector)
         else:
              # Tenta busca por texto
             found_btn = page.get_by_text("Encontrar um Resultado").first
             if await found_btn.is_visible():
                 await found_btn.click()
-        await wait_random()
 
         # 2. Futebol Virtual
         fv_selector = '#ResultsSportsList > div:nth-child(43) > button > div'
-        if await page.is_visible(fv_selector):
+        if await aguardar_visivel(page, fv_selector, RECOVERY_TIMEOUT):
             await page.click(fv_selector)
         else:
              fv_btn = page.locator("#ResultsSportsList").get_by_text("Futebol Virtual").first
              if await fv_btn.is_visible():
                  await fv_btn.click()
-        await wait_random()
 
-        # 3. Data
+        # 3. Data (a do dia da lista do worker; hoje por padrão)
         try:
-            now = datetime.now()
-            current_day = now.day
+            current_day = (dia_lista.get() or datetime.now().date()).day
             dates_container_selector = '#ResultsDatePicker > div > div.date-picker__selector-wrapper > div.date-picker__selector > div.date-picker__dates'
+            await aguardar_visivel(page, dates_container_selector, RECOVERY_TIMEOUT)
             dates_container = page.locator(dates_container_selector)
             day_locator = dates_container.get_by_text(str(current_day), exact=True)
             if await day_locator.is_visible():
                 await day_locator.click(force=True)
                 await day_locator.click() # Garantir click
             await page.click('#ResultsDatePicker > div > button') # Confirmar
-            await wait_random()
         except:
-            print(f"⚠️ [{comp_name}] Erro ao setar data (pode já estar correta).")
+            log.warning(f"⚠️ [{comp_name}] Erro ao setar data (pode já estar correta).")
 
         # 4. Selecionar a Competição
-        comp_selector = competitions_map.get(comp_name)
-        if comp_selector and await page.is_visible(comp_selector):
-            await page.click(comp_selector)
-        else:
-             search_name = comp_name
-             if comp_name == "Sul Americano": search_name = "Super Liga Sul-Americana"
-             c_btn = page.locator("#CompetitionList").get_by_text(search_name).first
-             if await c_btn.is_visible():
-                 await c_btn.click()
+        await aguardar_visivel(page, COMPETITION_LIST_SELECTOR, RECOVERY_TIMEOUT)
+        await selecionar_competicao(page, comp_name)
         
-        print(f"✅ [{comp_name}] Navegação inicial concluída.")
-        await wait_random()
+        # Confirma pelo container de partidas em vez de esperar um tempo fixo
+        if await aguardar_visivel(page, MATCHES_CONTAINER_SELECTOR, RECOVERY_TIMEOUT):
+            log.info(f"✅ [{comp_name}] Navegação inicial concluída.")
+        else:
+            log.warning(f"⚠️ [{comp_name}] Navegação concluída, mas o container de partidas não apareceu.")
     except Exception as e:
-        print(f"❌ [{comp_name}] Erro na navegação: {e}")
+        log.error(f"❌ [{comp_name}] Erro na navegação: {e}")
         raise e
 
-async def worker_competition(context, comp_name, csv_path):
+async def recuperar_lista(page, comp_name, motivo):
+    """
+    Escada de recuperação para voltar à lista de partidas da competição:
+    1. refresh: re-seleciona a competição se a lista de competições estiver na tela
+    2. go_back: volta uma página no histórico do SPA
+    3. navegacao: navegação completa (navigate_to_competition)
+    Cada etapa é validada pela presença do container de partidas.
+    O tempo de cada incidente é registrado em metricas ("recuperacao").
+    """
+    inicio = time.monotonic()
+    etapa = None
+
+    try:
+        # 1. Refresh na própria página
+        if await page.is_visible(COMPETITION_LIST_SELECTOR):
+            if await selecionar_competicao(page, comp_name) and await aguardar_visivel(page, MATCHES_CONTAINER_SELECTOR, RECOVERY_TIMEOUT):
+                etapa = "refresh"
+
+        # 2. Voltar no histórico
+        if etapa is None:
+            try:
+                await page.go_back(wait_until="domcontentloaded", timeout=RECOVERY_TIMEOUT * 1000)
+            except: pass
+            if await aguardar_visivel(page, MATCHES_CONTAINER_SELECTOR, RECOVERY_TIMEOUT):
+                etapa = "go_back"
+            elif await page.is_visible(COMPETITION_LIST_SELECTOR):
+                if await selecionar_competicao(page, comp_name) and await aguardar_visivel(page, MATCHES_CONTAINER_SELECTOR, RECOVERY_TIMEOUT):
+                    etapa = "go_back"
+
+        # 3. Navegação completa
+        if etapa is None:
+            await navigate_to_competition(page, comp_name)
+            if await page.is_visible(MATCHES_CONTAINER_SELECTOR):
+                etapa = "navegacao"
+    except Exception as e:
+        log.error(f"❌ [{comp_name}] Erro na recuperação: {e}")
+
+    duracao = time.monotonic() - inicio
+    metricas.registrar_evento("recuperacao", duracao=duracao, competicao=comp_name, motivo=motivo, etapa=etapa or "falhou")
+    if etapa:
+        log.info(f"   [{comp_name}] 🔁 Recuperado via {etapa} em {duracao:.1f}s ({motivo}).")
+    else:
+        log.warning(f"⚠️ [{comp_name}] Recuperação falhou após {duracao:.1f}s ({motivo}).")
+    return etapa is not None
+
+# --- Reciclagem de Páginas ---
+_ultima_reciclagem_rss = 0.0
+
+def contar_navegacoes(page, estado):
+    # Conta navegações do frame principal (inclui as do histórico do SPA: click/go_back)
+    def on_nav(frame):
+        if frame == page.main_frame:
+            estado["navegacoes"] += 1
+    page.on("framenavigated", on_nav)
+
+async def js_heap_mb(page):
+    try:
+        used = await page.evaluate("() => performance.memory ? performance.memory.usedJSHeapSize : 0")
+        return round(used / 1024 / 1024, 1)
+    except:
+        return 0.0
+
+_aviso_psutil = False
+
+def browser_rss_mb():
+    # Soma o RSS de todos os processos filhos (browser, renderers, GPU...). Percorre a
+    # árvore de processos: chamar fora do event loop (run_in_executor)
+    global _aviso_psutil
+    if psutil is None:
+        if not _aviso_psutil:
+            _aviso_psutil = True
+            log.warning("⚠️ psutil não instalado: RSS do browser não é medido (RECYCLE_MAX_RSS_MB sem efeito).")
+        return 0.0
+    total = 0
+    for proc in psutil.Process().children(recursive=True):
+        try:
+            total += proc.memory_info().rss
+        except psutil.Error: pass
+    return round(total / 1024 / 1024, 1)
+
+async def motivo_reciclagem(page, comp_name, estado):
+    """
+    Retorna o motivo para reciclar a página (ou None). A memória é amostrada a cada
+    MEMORY_CHECK_INTERVAL segundos e registrada em metricas ("memoria").
+    """
+    global _ultima_reciclagem_rss
+    if RECYCLE_MAX_NAVIGATIONS and estado["navegacoes"] >= RECYCLE_MAX_NAVIGATIONS:
+        return "navegacoes"
+
+    agora = time.monotonic()
+    if agora - estado["ultima_checagem"] < MEMORY_CHECK_INTERVAL:
+        return None
+    estado["ultima_checagem"] = agora
+
+    heap = await js_heap_mb(page)
+    rss = await asyncio.get_running_loop().run_in_executor(None, browser_rss_mb)
+    metricas.registrar_evento("memoria", competicao=comp_name, js_heap_mb=heap, rss_mb=rss, navegacoes=estado["navegacoes"])
+
+    if RECYCLE_MAX_JS_HEAP_MB and heap >= RECYCLE_MAX_JS_HEAP_MB:
+        return "js_heap"
+    # RSS é do browser inteiro: só um worker recicla por intervalo
+    if RECYCLE_MAX_RSS_MB and rss >= RECYCLE_MAX_RSS_MB and agora - _ultima_reciclagem_rss >= MEMORY_CHECK_INTERVAL:
+        _ultima_reciclagem_rss = agora
+        return "rss"
+    return None
+
+async def reciclar_pagina(context, page, comp_name, estado, motivo):
+    """
+    Abre uma página nova já posicionada na lista da competição e só então fecha a antiga.
+    O anchor continua em memória no worker, então a coleta segue do mesmo ponto.
+    """
+    inicio = time.monotonic()
+    heap_antes = await js_heap_mb(page)
+    nova = await context.new_page()
+    if estado.get("captura"):
+        estado["captura"].anexar(nova)
+    try:
+        await navigate_to_competition(nova, comp_name)
+        if not await nova.is_visible(MATCHES_CONTAINER_SELECTOR):
+            raise Exception("container de partidas não apareceu")
+    except Exception as e:
+        log.warning(f"⚠️ [{comp_name}] Reciclagem abortada ({e}). Mantendo a página atual.")
+        await nova.close()
+        estado["ultima_checagem"] = time.monotonic()
+        return page
+
+    navegacoes = estado["navegacoes"]
+    await page.close()
+    estado["navegacoes"] = 0
+    contar_navegacoes(nova, estado)
+
+    duracao = time.monotonic() - inicio
+    metricas.registrar_evento("reciclagem", duracao=duracao, competicao=comp_name, motivo=motivo,
+                              navegacoes=navegacoes, js_heap_mb=heap_antes)
+    log.info(f"♻️ [{comp_name}] Página reciclada ({motivo}, {navegacoes} navegações, {heap_antes} MB de heap) em {duracao:.1f}s.")
+    return nova
+
+async def localizar_jogo(page, h, m):
+    """
+    Botão do jogo h:m na lista (o horário pode aparecer como 14:30 ou 14.30).
+    """
+    btn_locator = page.locator(f"{MATCHES_CONTAINER_SELECTOR} > button").filter(has_text=f"{h:02d}:{m:02d}").first
+    if await btn_locator.count() == 0:
+        btn_locator = page.locator(f"{MATCHES_CONTAINER_SELECTOR} > button").filter(has_text=f"{h:02d}.{m:02d}").first
+    return btn_locator
+
+async def drenar_recoleta(page, comp_name, fila, visiveis, prazo, captura=None):
+    """
+    Usa o tempo ocioso até `prazo` (time.monotonic) para recoletar as lacunas da fila,
+    da maior para a menor prioridade. Jogos fora da lista atual contam como tentativa.
+    """
+    for chave in fila.pendentes():
+        if time.monotonic() >= prazo:
+            break
+        date_str, h, m = chave
+        if chave not in visiveis:
+            fila.falhou(chave)
+            continue
+        try:
+            btn_locator = await localizar_jogo(page, h, m)
+            if await btn_locator.count() == 0:
+                fila.falhou(chave)
+                continue
+            marca = captura.marcar() if captura else 0
+            await btn_locator.click(timeout=5000)
+            await wait_random()
+            valores = await extrair_resultado(page, captura, marca)
+            res = valores.get(mercados.PRINCIPAL, "")
+            if res:
+                await salvar_resultado(comp_name, date_str, h, m, res, valores)
+                fila.concluir(chave)
+                log.info(f"     [{comp_name}] 🩹 Lacuna recoletada: {h:02d}:{m:02d} -> {res}")
+            else:
+                fila.falhou(chave)
+            metricas.registrar_evento("recoleta", competicao=comp_name, jogo=f"{date_str} {h:02d}:{m:02d}", sucesso=bool(res))
+            await page.go_back()
+            await wait_random()
+        except Exception as e:
+            fila.falhou(chave)
+            log.warning(f"     [{comp_name}] ⚠️ Erro ao recoletar {h:02d}:{m:02d}: {e}")
+            try:
+                if not await page.is_visible(MATCHES_CONTAINER_SELECTOR):
+                    await page.go_back()
+            except: pass
+
+async def aguardar_polling(page, comp_name, fila, scraped_matches, captura=None):
+    """
+    Espera do polling: detecta lacunas nas datas visíveis, drena a fila de recoleta
+    e dorme o restante do intervalo.
+    """
+    prazo = time.monotonic() + POLLING_INTERVAL
+    try:
+        for date_str, hora, minuto in await persistencia.detect_gaps(comp_name, {m['date_str'] for m in scraped_matches}):
+            fila.adicionar(date_str, hora, minuto)
+        if len(fila):
+            log.info(f"   [{comp_name}] 🩹 {len(fila)} lacunas na fila de recoleta.")
+            visiveis = {(m['date_str'], m['h'], m['m']) for m in scraped_matches}
+            await drenar_recoleta(page, comp_name, fila, visiveis, prazo, captura)
+    except Exception as e:
+        log.warning(f"   [{comp_name}] ⚠️ Erro na recoleta de lacunas: {e}")
+    await asyncio.sleep(max(prazo - time.monotonic(), 0))
+
+async def worker_competition(context, comp_name):
     """
     Função que roda em uma aba separada para cada competição.
     """
-    print(f"🚀 [{comp_name}] Iniciando worker...")
+    registro.competicao_atual.set(comp_name)  # logs desta task saem marcados com a competição
+    log.info(f"🚀 [{comp_name}] Iniciando worker...")
     page = await context.new_page()
+    estado_pagina = {"navegacoes": 0, "ultima_checagem": time.monotonic()}
+    contar_navegacoes(page, estado_pagina)
+
+    # Modo captura de rede: escuta as respostas da página (acompanha a reciclagem da página)
+    captura = None
+    if CAPTURA_REDE:
+        captura = rede.CapturaRede(CAPTURA_REDE_URL)
+        captura.anexar(page)
+        estado_pagina["captura"] = captura
     
     try:
         await navigate_to_competition(page, comp_name)
@@ -320,10 +580,10 @@ async def worker_competition(context, comp_name, csv_path):
         anchor_minutes = -1
         
         # Tenta carregar Anchor existente
-        saved_anchor = load_anchor_time(comp_name)
+        saved_anchor = await persistencia.load_anchor_time(comp_name)
         if saved_anchor:
             anchor_minutes = time_str_to_minutes(saved_anchor)
-            print(f"   [{comp_name}] ⚓ Anchor carregado do arquivo: {saved_anchor}")
+            log.info(f"   [{comp_name}] ⚓ Anchor carregado do arquivo: {saved_anchor}")
         
         # Flag para indicar se precisamos fazer a calibração inicial (busca do anchor + lookback)
         # Se já carregamos um anchor, assumimos que estamos em modo incremental (ou o usuário quer recalibrar sempre?)
@@ -331,65 +591,103 @@ async def worker_competition(context, comp_name, csv_path):
         # Mas também diz: "casos de interrupção, iniciar a partir desse anchor_time".
         # Vamos assumir: Se tem arquivo, usa. Se não tem, calibra.
         need_calibration = (anchor_minutes == -1)
+        current_day = datetime.now().date()
+        dia_lista.set(current_day)
+        ultimo_listado = None  # minutos do último jogo da lista atual
+
+        # Jogos pulados (sumiu, timeout, erro) e lacunas detectadas pela cadência
+        fila_recoleta = lacunas.FilaRecoleta(RECOLETA_MAX_TENTATIVAS)
 
         # --- LOOP INFINITO DA COMPETIÇÃO ---
         while True:
             try:
+                # Virada do dia: o anchor é diário e a lista precisa ser reaberta com a nova data.
+                # Antes disso a lista de ontem é drenada (os últimos jogos, 23:5x, só têm resultado
+                # depois da meia-noite) até o último jogo listado passar do anchor ou até
+                # TOLERANCIA_MINUTOS depois da meia-noite.
+                agora = datetime.now()
+                if agora.date() != current_day:
+                    drenada = ultimo_listado is not None and anchor_minutes >= ultimo_listado
+                    meia_noite = datetime.combine(agora.date(), datetime.min.time())
+                    if drenada or agora - meia_noite >= timedelta(minutes=particoes.TOLERANCIA_MINUTOS):
+                        if not drenada:
+                            log.warning(f"   [{comp_name}] ⚠️ Lista de {current_day.strftime('%d/%m/%Y')} não drenada até "
+                                        f"{minutes_to_time_str(ultimo_listado or 0)} (anchor {minutes_to_time_str(max(anchor_minutes, 0))}).")
+                        metricas.registrar_evento("virada_dia", competicao=comp_name, dia=current_day.strftime('%d/%m/%Y'), drenada=drenada)
+                        current_day = agora.date()
+                        dia_lista.set(current_day)
+                        ultimo_listado = None
+                        log.info(f"🌙 [{comp_name}] Novo dia ({current_day.strftime('%d/%m/%Y')}). Reabrindo lista e recalibrando...")
+                        anchor_minutes = -1
+                        need_calibration = True
+                        await navigate_to_competition(page, comp_name)
+
+                # Reciclagem por número de navegações ou orçamento de memória
+                motivo = await motivo_reciclagem(page, comp_name, estado_pagina)
+                if motivo:
+                    page = await reciclar_pagina(context, page, comp_name, estado_pagina, motivo)
+
                 # Verifica se estamos na lista de partidas
-                matches_container_selector = "#ResultsComponent > div:nth-child(3) > div"
+                matches_container_selector = MATCHES_CONTAINER_SELECTOR
                 if not await page.is_visible(matches_container_selector):
-                    print(f"⚠️ [{comp_name}] Container de partidas não visível. Reiniciando ciclo...")
-                    await page.goto(TARGET_URL, wait_until="domcontentloaded", timeout=60000)
-                    print(f"⏳ [{comp_name}] Aguardando 30s na lista de competições...")
-                    await asyncio.sleep(30)
-                    await navigate_to_competition(page, comp_name)
+                    log.warning(f"⚠️ [{comp_name}] Container de partidas não visível. Recuperando...")
+                    if not await recuperar_lista(page, comp_name, "container_invisivel"):
+                        await asyncio.sleep(POLLING_INTERVAL)
                     continue
 
-                now_extract = datetime.now()
-                date_str = now_extract.strftime('%d/%m/%Y')
-                
                 # Coleta botões
                 all_buttons = page.locator(f"{matches_container_selector} > button")
                 count = await all_buttons.count()
                 
                 if count == 0:
-                    print(f"   [{comp_name}] 0 partidas. Aguardando...")
+                    log.info(f"   [{comp_name}] 0 partidas. Aguardando...")
                     await asyncio.sleep(POLLING_INTERVAL)
                     continue
 
                 scraped_matches = []
+                # Modo captura de rede: horários da resposta da lista (sem ler botão a botão)
+                horarios_rede = await horarios_da_rede(captura, all_buttons, count)
                 for i in range(count):
                     btn = all_buttons.nth(i)
-                    text_content = await btn.inner_text()
-                    lines = [l.strip() for l in text_content.split('\n') if l.strip()]
-                    if not lines: continue
-                    
-                    # Parse Hora
-                    h, m = 0, 0
-                    time_str = ""
-                    if len(lines) > 0:
-                        parts = lines[0].split(' ', 1)
-                        if len(parts) >= 1: time_str = parts[0]
-                    
-                    if time_str:
-                        try:
-                            clean_time = time_str.rstrip('.')
-                            separator = '.' if '.' in clean_time else ':'
-                            if separator in clean_time:
-                                h_str, m_str = clean_time.split(separator)[:2]
-                                h, m = int(h_str), int(m_str)
-                        except: pass
+                    if horarios_rede:
+                        h, m = horarios_rede[i]
+                        time_str = f"{h:02d}.{m:02d}"
+                    else:
+                        text_content = await btn.inner_text()
+                        lines = [l.strip() for l in text_content.split('\n') if l.strip()]
+                        if not lines: continue
+                        
+                        # Parse Hora
+                        h, m = 0, 0
+                        time_str = ""
+                        if len(lines) > 0:
+                            parts = lines[0].split(' ', 1)
+                            if len(parts) >= 1: time_str = parts[0]
+                        
+                        if time_str:
+                            try:
+                                clean_time = time_str.rstrip('.')
+                                separator = '.' if '.' in clean_time else ':'
+                                if separator in clean_time:
+                                    h_str, m_str = clean_time.split(separator)[:2]
+                                    h, m = int(h_str), int(m_str)
+                            except: pass
                     
+                    # Data do jogo = dia da lista aberta (não a do relógio): após a meia-noite
+                    # os jogos da lista de ontem continuam gravados em ontem
+                    date_str = current_day.strftime('%d/%m/%Y')
                     scraped_matches.append({
-                        "h": h, "m": m, "btn": btn, "index": i, "time_str": time_str
+                        "h": h, "m": m, "btn": btn, "index": i, "time_str": time_str, "date_str": date_str
                     })
                 
                 # Ordena (mais recente primeiro) para processamento inicial
                 scraped_matches.sort(key=lambda x: (x['h'], x['m']), reverse=True)
+                if scraped_matches:
+                    ultimo_listado = scraped_matches[0]['h'] * 60 + scraped_matches[0]['m']
 
                 # --- 1. Calibração e Lookback (Executado apenas se não temos Anchor) ---
                 if need_calibration:
-                    print(f"   [{comp_name}] 🔍 Iniciando Calibração (Buscando maior hora com resultado)...")
+                    log.info(f"   [{comp_name}] 🔍 Iniciando Calibração (Buscando maior hora com resultado)...")
                     
                     found_anchor_match = None
                     
@@ -407,18 +705,20 @@ async def worker_competition(context, comp_name, csv_path):
                         if await btn_locator.count() == 0: continue
 
                         try:
+                            marca = captura.marcar() if captura else 0
                             await btn_locator.click(timeout=5000)
                             await wait_random()
-                            res = await extract_ambos_marcam_logic(page)
+                            valores = await extrair_resultado(page, captura, marca)
+                            res = valores.get(mercados.PRINCIPAL, "")
                             
                             if res:
                                 # ACHOU!
                                 found_anchor_match = match
                                 anchor_minutes = match['h'] * 60 + match['m']
                                 anchor_str = minutes_to_time_str(anchor_minutes)
-                                save_anchor_time(comp_name, anchor_str)
-                                await save_match_data(comp_name, date_str, match['h'], match['m'], res, csv_path)
-                                print(f"     [{comp_name}] ⚓ Anchor Definido: {anchor_str} (Resultado: {res})")
+                                await persistencia.save_anchor_time(comp_name, anchor_str, current_day)
+                                await salvar_resultado(comp_name, match['date_str'], match['h'], match['m'], res, valores)
+                                log.info(f"     [{comp_name}] ⚓ Anchor Definido: {anchor_str} (Resultado: {res})")
                                 await page.go_back()
                                 await wait_random()
                                 break
@@ -427,7 +727,7 @@ async def worker_competition(context, comp_name, csv_path):
                             await page.go_back()
                             await wait_random()
                         except Exception as e_calib:
-                            print(f"     [{comp_name}] ⚠️ Erro na calibração jogo {target_time}: {e_calib}")
+                            log.warning(f"     [{comp_name}] ⚠️ Erro na calibração jogo {target_time}: {e_calib}")
                             try: await page.go_back() 
                             except: pass
 
@@ -439,7 +739,7 @@ async def worker_competition(context, comp_name, csv_path):
                         if start_h < 0: start_h = 0
                         limit_minutes = start_h * 60
                         
-                        print(f"   [{comp_name}] 🔙 Iniciando Coleta de Lookback (A partir das {start_h:02d}:00 até {minutes_to_time_str(anchor_minutes)})...")
+                        log.info(f"   [{comp_name}] 🔙 Iniciando Coleta de Lookback (A partir das {start_h:02d}:00 até {minutes_to_time_str(anchor_minutes)})...")
                         
                         # Filtra jogos entre Limit e Anchor (exclusivo do Anchor pois já coletamos)
                         lookback_matches = []
@@ -460,21 +760,24 @@ async def worker_competition(context, comp_name, csv_path):
                                      btn_locator = page.locator(f"{matches_container_selector} > button").filter(has_text=target_time_dot).first
                                 
                                 if await btn_locator.count() > 0:
+                                    marca = captura.marcar() if captura else 0
                                     await btn_locator.click(timeout=5000)
                                     await wait_random()
-                                    res = await extract_ambos_marcam_logic(page)
+                                    valores = await extrair_resultado(page, captura, marca)
+                                    res = valores.get(mercados.PRINCIPAL, "")
                                     if res:
-                                        await save_match_data(comp_name, date_str, match['h'], match['m'], res, csv_path)
-                                        print(f"     [{comp_name}] 🔙 Lookback: {match['h']:02d}:{match['m']:02d} -> {res}")
+                                        await salvar_resultado(comp_name, match['date_str'], match['h'], match['m'], res, valores)
+                                        log.info(f"     [{comp_name}] 🔙 Lookback: {match['h']:02d}:{match['m']:02d} -> {res}")
                                     await page.go_back()
                                     await wait_random()
                             except:
+                                fila_recoleta.adicionar(match['date_str'], match['h'], match['m'])
                                 try: await page.go_back()
                                 except: pass
                         
                         need_calibration = False # Calibração concluída
                     else:
-                        print(f"   [{comp_name}] ⚠️ Nenhum resultado encontrado na lista para calibrar. Aguardando...")
+                        log.warning(f"   [{comp_name}] ⚠️ Nenhum resultado encontrado na lista para calibrar. Aguardando...")
                         await asyncio.sleep(POLLING_INTERVAL)
                         continue
 
@@ -489,32 +792,18 @@ async def worker_competition(context, comp_name, csv_path):
                 matches_to_check.sort(key=lambda x: (x['h'], x['m']))
 
                 # [NOVO] Carregar resultados existentes para pular
-                existing_results = set()
-                if csv_path.exists():
-                    try:
-                        df_check = pd.read_csv(csv_path)
-                        df_comp = df_check[df_check['Competição'] == comp_name]
-                        valid_rows = df_comp[df_comp['Ambos Marcam'].notna() & (df_comp['Ambos Marcam'] != '')]
-                        for _, row in valid_rows.iterrows():
-                            try:
-                                h_e = int(row['Hora'])
-                                m_e = int(row['Minuto'])
-                                existing_results.add(f"{h_e}:{m_e}")
-                            except: pass
-                    except: pass
+                existing_results = await persistencia.load_existing_results(comp_name, {m['date_str'] for m in matches_to_check})
 
                 if not matches_to_check:
                     # print(f"   [{comp_name}] Nada novo acima do Anchor. Aguardando...")
-                    await asyncio.sleep(POLLING_INTERVAL)
+                    await aguardar_polling(page, comp_name, fila_recoleta, scraped_matches, captura)
                     continue
                 
-                print(f"   [{comp_name}] {len(matches_to_check)} jogos INCREMENTAIS pendentes (>= {minutes_to_time_str(anchor_minutes)}).")
-                
-                should_restart_loop = False
+                log.info(f"   [{comp_name}] {len(matches_to_check)} jogos INCREMENTAIS pendentes (>= {minutes_to_time_str(anchor_minutes)}).")
                 
                 for match in matches_to_check:
                     # [NOVO] Verifica se já existe
-                    match_key = f"{match['h']}:{match['m']}"
+                    match_key = f"{match['date_str']} {match['h']}:{match['m']}"
                     if match_key in existing_results:
                         # print(f"     [{comp_name}] ⏭️ {match_key} já coletado. Pulando.")
                         # Atualiza Anchor se necessário para não ficar preso
@@ -522,7 +811,7 @@ async def worker_competition(context, comp_name, csv_path):
                         if match_minutes > anchor_minutes:
                             anchor_minutes = match_minutes
                             new_anchor_str = minutes_to_time_str(anchor_minutes)
-                            save_anchor_time(comp_name, new_anchor_str)
+                            await persistencia.save_anchor_time(comp_name, new_anchor_str, current_day)
                         continue
                     try:
                         target_time = f"{match['h']:02d}:{match['m']:02d}"
@@ -533,139 +822,277 @@ async def worker_competition(context, comp_name, csv_path):
                              btn_locator = page.locator(f"{matches_container_selector} > button").filter(has_text=target_time_dot).first
                         
                         if await btn_locator.count() == 0:
-                            print(f"     [{comp_name}] ⚠️ Jogo {target_time} sumiu. Pulando.")
+                            log.warning(f"     [{comp_name}] ⚠️ Jogo {target_time} sumiu. Pulando.")
+                            fila_recoleta.adicionar(match['date_str'], match['h'], match['m'])
                             continue
 
+                        marca = captura.marcar() if captura else 0
                         await btn_locator.click(timeout=5000)
                         await wait_random()
                         
-                        res = await extract_ambos_marcam_logic(page)
+                        valores = await extrair_resultado(page, captura, marca)
+                        res = valores.get(mercados.PRINCIPAL, "")
                         
                         if not res:
                             # --- FLUXO DE NÃO ENCONTRADO (Apenas no Incremental) ---
-                            print(f"     [{comp_name}] ⚠️ {target_time} sem resultado 'Ambos Marcam'.")
-                            print(f"     [{comp_name}] 🔄 Retornando à Home e aguardando 30s...")
-                            
-                            await page.goto(TARGET_URL, wait_until="domcontentloaded", timeout=60000)
-                            await asyncio.sleep(30)
-                            await navigate_to_competition(page, comp_name)
-                            
-                            should_restart_loop = True
+                            # Resultado ainda não publicado: volta para a lista e aguarda o próximo polling
+                            log.warning(f"     [{comp_name}] ⚠️ {target_time} sem resultado 'Ambos Marcam'.")
+                            await recuperar_lista(page, comp_name, "sem_resultado")
                             break 
 
                         # Salva resultado
-                        await save_match_data(comp_name, date_str, match['h'], match['m'], res, csv_path)
-                        print(f"     [{comp_name}] ✅ {match['h']:02d}:{match['m']:02d} -> {res}")
+                        await salvar_resultado(comp_name, match['date_str'], match['h'], match['m'], res, valores)
+                        log.info(f"     [{comp_name}] ✅ {match['h']:02d}:{match['m']:02d} -> {res}")
                         
                         # Atualiza Anchor Time
                         match_minutes = match['h'] * 60 + match['m']
                         if match_minutes > anchor_minutes:
                             anchor_minutes = match_minutes
                             new_anchor_str = minutes_to_time_str(anchor_minutes)
-                            save_anchor_time(comp_name, new_anchor_str)
+                            await persistencia.save_anchor_time(comp_name, new_anchor_str, current_day)
 
                         await page.go_back()
                         await wait_random()
                         
                     except Exception as e_match:
-                        print(f"     [{comp_name}] ❌ Erro no jogo {match['h']}:{match['m']}: {e_match}")
+                        log.error(f"     [{comp_name}] ❌ Erro no jogo {match['h']}:{match['m']}: {e_match}")
+                        fila_recoleta.adicionar(match['date_str'], match['h'], match['m'])
                         try:
                             if not await page.is_visible(matches_container_selector):
                                 await page.go_back()
                         except: pass
 
-                if should_restart_loop:
-                    continue
-
-                await asyncio.sleep(POLLING_INTERVAL)
+                await aguardar_polling(page, comp_name, fila_recoleta, scraped_matches, captura)
 
             except Exception as e_loop:
-                print(f"❌ [{comp_name}] Erro no loop: {e_loop}")
+                log.error(f"❌ [{comp_name}] Erro no loop: {e_loop}")
                 await asyncio.sleep(10)
                 try:
                     await page.reload()
                 except: pass
 
     except Exception as e_worker:
-        print(f"❌ [{comp_name}] Falha fatal no worker: {e_worker}")
+        log.error(f"❌ [{comp_name}] Falha fatal no worker: {e_worker}")
 
-async def main():
-    print(f"🚀 Iniciando Sistema Multi-Abas (teste2.py)...")
+async def iniciar_browser(p):
+    # Tenta matar processos Chrome
+    import subprocess
+    subprocess.run(["tasklist", "/FI", "IMAGENAME eq chrome.exe"], capture_output=True)
     
-    # Setup Inicial (Login Único)
-    async with async_playwright() as p:
-        # Tenta matar processos Chrome
-        import subprocess
-        subprocess.run(["tasklist", "/FI", "IMAGENAME eq chrome.exe"], capture_output=True)
-        
-        browser = await p.chromium.launch(
-            channel=BROWSER_CHANNEL,
-            headless=False,
-            args=["--no-default-browser-check", "--disable-infobars", "--start-maximized"]
-        )
-        context = await browser.new_context(viewport={"width": 1280, "height": 720})
-        
-        # Scripts anti-detecção
-        await context.add_init_script("""
-            Object.defineProperty(navigator, 'webdriver', {get: () => undefined});
-            if (!window.chrome) window.chrome = { runtime: {} };
-        """)
-
-        # --- FASE 1: LOGIN CENTRALIZADO ---
-        page = await context.new_page()
-        print(f"🌍 Navegando para Login ({TARGET_URL})...")
-        await page.goto(TARGET_URL, wait_until="domcontentloaded", timeout=60000)
-        
-        login_btn_selector = '#logged-out-container > div.mobileLoginSection > a'
-        user_icon_selector = '.hm-MainHeaderMembers'  # Exemplo de seletor de usuário logado (pode variar)
-        
-        if await page.is_visible(login_btn_selector):
-            print("🔑 Realizando Login...")
-            await page.click(login_btn_selector)
-            await wait_random()
-            await page.fill('#txtUsername', USERNAME)
-            await wait_random()
-            await page.fill('#txtPassword', PASSWORD)
-            await wait_random()
-            await page.keyboard.press('Enter')
-            
-            print("⏳ Aguardando processamento do login...")
-            try:
-                # Espera o botão de login sumir (indica sucesso)
-                await page.locator(login_btn_selector).wait_for(state="detached", timeout=30000)
-                print("✅ Login efetuado (botão de login desapareceu).")
-            except Exception as e:
-                print(f"⚠️ Timeout ou erro aguardando login: {e}")
-            
-            await asyncio.sleep(5) # Buffer extra para cookies assentarem
-        else:
-            print("✅ Já logado (ou botão de login não encontrado).")
+    return await p.chromium.launch(
+        channel=BROWSER_CHANNEL,
+        headless=False,
+        args=["--no-default-browser-check", "--disable-infobars", "--start-maximized"]
+    )
 
-        # Modal de boas-vindas ou mensagens
-        modal_selector = '#ResultsPage > div.modal.loggedin.hide-modal-for-members > button'
+async def criar_contexto(browser, storage_state=None):
+    context = await browser.new_context(viewport={"width": 1280, "height": 720}, storage_state=storage_state)
+    
+    # Scripts anti-detecção
+    await context.add_init_script("""
+        Object.defineProperty(navigator, 'webdriver', {get: () => undefined});
+        if (!window.chrome) window.chrome = { runtime: {} };
+    """)
+    return context
+
+async def fazer_login(context):
+    page = await context.new_page()
+    log.info(f"🌍 Navegando para Login ({TARGET_URL})...")
+    await page.goto(TARGET_URL, wait_until="domcontentloaded", timeout=60000)
+    
+    login_btn_selector = LOGIN_BTN_SELECTOR
+    
+    if await page.is_visible(login_btn_selector):
+        log.info("🔑 Realizando Login...")
+        await page.click(login_btn_selector)
+        await wait_random()
+        await page.fill('#txtUsername', USERNAME)
+        await wait_random()
+        await page.fill('#txtPassword', PASSWORD)
+        await wait_random()
+        await page.keyboard.press('Enter')
+        
+        log.info("⏳ Aguardando processamento do login...")
         try:
-            if await page.is_visible(modal_selector, timeout=5000):
-                await page.click(modal_selector)
-        except: pass
+            # Espera o botão de login sumir (indica sucesso)
+            await page.locator(login_btn_selector).wait_for(state="detached", timeout=30000)
+            log.info("✅ Login efetuado (botão de login desapareceu).")
+        except Exception as e:
+            log.warning(f"⚠️ Timeout ou erro aguardando login: {e}")
         
-        # Fecha a página de login, vamos abrir abas limpas para os workers
+        await asyncio.sleep(5) # Buffer extra para cookies assentarem
+    else:
+        log.info("✅ Já logado (ou botão de login não encontrado).")
+
+    # Modal de boas-vindas ou mensagens
+    modal_selector = '#ResultsPage > div.modal.loggedin.hide-modal-for-members > button'
+    try:
+        if await page.is_visible(modal_selector, timeout=5000):
+            await page.click(modal_selector)
+    except: pass
+    
+    # Fecha a página de login, vamos abrir abas limpas para os workers
+    await page.close()
+
+def estado_sessao_utilizavel(path):
+    """
+    Checagem offline: o arquivo existe e tem ao menos um cookie não expirado.
+    """
+    if not path.exists():
+        return False
+    try:
+        with open(path, "r", encoding="utf-8") as fp:
+            cookies = json.load(fp).get("cookies", [])
+        agora = time.time()
+        return any(c.get("expires", -1) == -1 or c.get("expires", 0) > agora for c in cookies)
+    except:
+        return False
+
+async def sessao_valida(context):
+    """
+    Checagem barata: abre o site e espera o cabeçalho de membro ou o botão de login,
+    o que aparecer primeiro. Só o cabeçalho de membro vale como sessão válida; se nada
+    aparecer em SESSION_CHECK_TIMEOUT, a sessão é tratada como inválida (login completo).
+    """
+    page = await context.new_page()
+    try:
+        await page.goto(TARGET_URL, wait_until="domcontentloaded", timeout=60000)
+        if not await aguardar_visivel(page, f"{LOGGED_IN_SELECTOR}:visible, {LOGIN_BTN_SELECTOR}:visible", SESSION_CHECK_TIMEOUT):
+            log.warning("⚠️ Página não mostrou login nem usuário logado no prazo. Sessão descartada.")
+            return False
+        return await page.is_visible(LOGGED_IN_SELECTOR)
+    except Exception as e:
+        log.warning(f"⚠️ Erro ao validar sessão salva: {e}")
+        return False
+    finally:
         await page.close()
 
+async def obter_contexto_autenticado(browser):
+    """
+    Reutiliza o storage state salvo em disco quando ainda válido; caso contrário faz o login
+    completo e salva a nova sessão para a próxima inicialização.
+    """
+    global MODO_SESSAO
+    inicio = time.monotonic()
+
+    if estado_sessao_utilizavel(STORAGE_STATE_PATH):
+        context = await criar_contexto(browser, storage_state=str(STORAGE_STATE_PATH))
+        if await sessao_valida(context):
+            MODO_SESSAO = "reutilizada"
+            log.info(f"✅ Sessão salva reutilizada ({time.monotonic() - inicio:.1f}s).")
+            metricas.registrar_evento("sessao", duracao=time.monotonic() - inicio, modo=MODO_SESSAO)
+            return context
+        log.warning("⚠️ Sessão salva expirada. Fazendo login completo...")
+        await context.close()
+
+    garantir_credenciais()
+    context = await criar_contexto(browser)
+    await fazer_login(context)
+    SESSION_DIR.mkdir(exist_ok=True)
+    await context.storage_state(path=str(STORAGE_STATE_PATH))
+    MODO_SESSAO = "login"
+    metricas.registrar_evento("sessao", duracao=time.monotonic() - inicio, modo=MODO_SESSAO)
+    return context
+
+async def salvar_resultado(comp_name, date_str, hour, minute, res, valores=None):
+    global _primeiro_resultado
+    await persistencia.save_match_data(comp_name, date_str, hour, minute, res, valores)
+    if not _primeiro_resultado:
+        _primeiro_resultado = True
+        duracao = time.time() - INICIO_EXECUCAO
+        log.info(f"⏱️ [{comp_name}] Primeiro resultado {duracao:.1f}s após o início (sessão: {MODO_SESSAO}).")
+        metricas.registrar_evento("primeiro_resultado", duracao=duracao, competicao=comp_name, sessao=MODO_SESSAO)
+
+async def executar_workers(context, comps):
+    tasks = []
+    for comp in comps:
+        tasks.append(worker_competition(context, comp))
+    
+    # Monitor de atraso do event loop (prova que os workers não se bloqueiam)
+    tasks.append(metricas.monitorar_lag(limiar=LOOP_LAG_THRESHOLD))
+
+    log.info(f"🔥 Iniciando {len(tasks) - 1} workers concorrentes...")
+    await asyncio.gather(*tasks)
+
+# --- Modo Sharded (multi-processo) ---
+async def main_shard(comps, storage_state_path):
+    async with async_playwright() as p:
+        browser = await iniciar_browser(p)
+        context = await criar_contexto(browser, storage_state=str(storage_state_path))
+        await executar_workers(context, comps)
+
+def processo_shard(comps, fila, storage_state_path, inicio_execucao, modo_sessao, nome="shard"):
+    """
+    Ponto de entrada de cada processo worker: event loop e contexto próprios,
+    sessão carregada do storage state e escrita delegada ao processo escritor.
+    """
+    global INICIO_EXECUCAO, MODO_SESSAO
+    INICIO_EXECUCAO, MODO_SESSAO = inicio_execucao, modo_sessao
+    registro.configurar(nome)
+    persistencia.usar_fila(fila)
+    try:
+        asyncio.run(main_shard(comps, storage_state_path))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        registro.encerrar()
+
+def executar_shards(n_processos):
+    import multiprocessing
+
+    ctx = multiprocessing.get_context("spawn")
+    fila = ctx.Queue()
+
+    escritor = ctx.Process(target=persistencia.processo_escritor, args=(fila,), name="escritor")
+    escritor.start()
+
+    shards = [COMPETITIONS_TO_RUN[i::n_processos] for i in range(n_processos)]
+    processos = []
+    for i, comps in enumerate(shards):
+        if not comps: continue
+        proc = ctx.Process(target=processo_shard, args=(comps, fila, STORAGE_STATE_PATH, INICIO_EXECUCAO, MODO_SESSAO, f"shard-{i}"), name=f"shard-{i}")
+        proc.start()
+        processos.append(proc)
+        log.info(f"🧩 Shard {i} (PID {proc.pid}): {', '.join(comps)}")
+
+    try:
+        for proc in processos:
+            proc.join()
+    finally:
+        for proc in processos:
+            if proc.is_alive(): proc.terminate()
+        fila.put(None) # Encerra o escritor após drenar a fila
+        escritor.join(timeout=30)
+        if escritor.is_alive():
+            log.warning("⚠️ Processo escritor não terminou em 30s. Encerrando à força.")
+            escritor.terminate()
+            escritor.join()
+
+async def main():
+    log.info(f"🚀 Iniciando Sistema Multi-Abas (teste2.py)...")
+    
+    # Setup Inicial (Login Único)
+    async with async_playwright() as p:
+        browser = await iniciar_browser(p)
+
+        # --- FASE 1: LOGIN CENTRALIZADO (ou sessão salva) ---
+        context = await obter_contexto_autenticado(browser)
+
         # --- FASE 2: LANÇAR WORKERS ---
-        HISTORY_DIR = ROOT / "historico"
-        HISTORY_DIR.mkdir(exist_ok=True)
-        date_filename = datetime.now().strftime('%d-%m-%Y')
-        csv_path = HISTORY_DIR / f"matches_{date_filename}.csv"
-
-        tasks = []
-        for comp in COMPETITIONS_TO_RUN:
-            tasks.append(worker_competition(context, comp, csv_path))
-        
-        print(f"🔥 Iniciando {len(tasks)} workers concorrentes...")
-        await asyncio.gather(*tasks)
+        if WORKER_PROCESSES > 1:
+            # A sessão já está em STORAGE_STATE_PATH; libera o browser, cada shard abre o seu
+            await browser.close()
+            return True
+
+        await executar_workers(context, COMPETITIONS_TO_RUN)
+    return False
 
 if __name__ == "__main__":
+    registro.configurar("app")
     try:
-        asyncio.run(main())
+        if asyncio.run(main()):
+            executar_shards(WORKER_PROCESSES)
     except KeyboardInterrupt:
         print("\n👋 Exiting...")
+    finally:
+        registro.encerrar()
@@ -0,0 +1,216 @@
+import math
+import os
+import threading
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+import catalogo
+import esquema
+import padroes
+import particoes
+
+# ==========================
+# Backtest vetorizado de regras sobre o histórico.
+# Regra: "depois de k resultados consecutivos `gatilho` na coluna, o próximo é `alvo`".
+# Cada coluna vira um array int8 (1 = Sim, 0 = Não, -1 = vazio) com todas as
+# competições/dias concatenados e separados por -1, então sequências nunca
+# atravessam dias ou competições. Cada variante custa algumas operações O(n) em numpy.
+# ==========================
+COLUNAS = ["Ambos Marcam"] + padroes.COLUNAS_PADROES
+CODIGOS = {"Sim": 1, "Não": 0}
+VAZIO = -1
+
+# Abaixo de PARALELO_MIN (posições × regras) o backtest roda no próprio processo:
+# subir processos e enviar os arrays custa mais que avaliar a grade
+PARALELO_MIN = 20_000_000
+
+
+def carregar_historico(inicio, fim):
+    """
+    Lê os dias catalogados entre inicio e fim (datetime) e retorna
+    {"colunas": {coluna: int8[]}, "competicao": int16[], "competicoes": [nomes]}.
+    """
+    cat = catalogo.atualizado()
+    blocos = {c: [] for c in COLUNAS}
+    comp_blocos = []
+    competicoes = []
+
+    d = inicio
+    while d <= fim:
+        if d.strftime("%Y-%m-%d") in cat:
+            df = particoes.ler_dia(d)
+            if df is not None:
+                with warnings.catch_warnings():
+                    warnings.simplefilter("ignore")
+                    df = padroes.calcular_padroes(df)
+                for comp, grupo in df.groupby('Competição', sort=False, observed=True):
+                    if comp not in competicoes:
+                        competicoes.append(comp)
+                    for c in COLUNAS:
+                        valores = esquema.codigos(grupo[c], CODIGOS, VAZIO) if c in grupo.columns \
+                            else np.full(len(grupo), VAZIO, np.int8)
+                        blocos[c].append(valores)
+                        blocos[c].append(np.array([VAZIO], np.int8))  # separador
+                    comp_blocos.append(np.full(len(grupo) + 1, competicoes.index(comp), np.int16))
+        d += timedelta(days=1)
+
+    if not comp_blocos:
+        return {"colunas": {c: np.array([], np.int8) for c in COLUNAS}, "competicao": np.array([], np.int16), "competicoes": []}
+    return {
+        "colunas": {c: np.concatenate(blocos[c]) for c in COLUNAS},
+        "competicao": np.concatenate(comp_blocos),
+        "competicoes": competicoes,
+    }
+
+
+def sequencia_atual(arr, valor):
+    """
+    r[i] = quantos `valor` consecutivos terminam na posição i (0 se arr[i] != valor).
+    """
+    idx = np.arange(len(arr))
+    quebras = np.where(arr != valor, idx, -1)
+    return idx - np.maximum.accumulate(quebras) if len(arr) else idx
+
+
+def distribuicao_sequencias(arr, valor):
+    """
+    {tamanho: quantidade} das sequências máximas de `valor`.
+    """
+    eq = np.concatenate(([False], arr == valor, [False])).astype(np.int8)
+    bordas = np.diff(eq)
+    tamanhos = np.flatnonzero(bordas == -1) - np.flatnonzero(bordas == 1)
+    contagem = np.bincount(tamanhos) if len(tamanhos) else np.array([], np.int64)
+    return {int(t): int(n) for t, n in enumerate(contagem) if n}
+
+
+def intervalo_wilson(acertos, n, z=1.96):
+    if n == 0:
+        return (float('nan'), float('nan'))
+    p = acertos / n
+    den = 1 + z * z / n
+    centro = (p + z * z / (2 * n)) / den
+    margem = z * math.sqrt(p * (1 - p) / n + z * z / (4 * n * n)) / den
+    return (centro - margem, centro + margem)
+
+
+def gerar_grade(colunas=("Ambos Marcam",), ks=range(1, 6), gatilhos=("Sim", "Não"), alvos=("Sim", "Não")):
+    return [
+        {"coluna": c, "k": k, "gatilho": g, "alvo": a}
+        for c in colunas for k in ks for g in gatilhos for a in alvos
+    ]
+
+
+def avaliar(dados, regras):
+    """
+    Avalia uma lista de regras; retorna uma linha por (regra, competição) + total "Todas".
+    """
+    linhas = []
+    comp = dados["competicao"]
+    n_comps = len(dados["competicoes"])
+    cache = {}
+    for regra in regras:
+        arr = dados["colunas"][regra["coluna"]]
+        if len(arr) < 2:
+            continue
+        chave = (regra["coluna"], regra["gatilho"])
+        if chave not in cache:
+            cache[chave] = sequencia_atual(arr, CODIGOS[regra["gatilho"]])
+        seq = cache[chave]
+
+        proximo = arr[1:]
+        ocorre = (seq[:-1] >= regra["k"]) & (proximo != VAZIO)
+        acerto = ocorre & (proximo == CODIGOS[regra["alvo"]])
+
+        ocorr_comp = np.bincount(comp[1:][ocorre], minlength=n_comps)
+        acert_comp = np.bincount(comp[1:][acerto], minlength=n_comps)
+        totais = [("Todas", int(ocorr_comp.sum()), int(acert_comp.sum()))]
+        totais += [(nome, int(ocorr_comp[i]), int(acert_comp[i])) for i, nome in enumerate(dados["competicoes"])]
+
+        for nome, n, acertos in totais:
+            ic_inf, ic_sup = intervalo_wilson(acertos, n)
+            linhas.append({
+                **regra,
+                "Competição": nome,
+                "ocorrencias": n,
+                "acertos": acertos,
+                "taxa": acertos / n if n else float('nan'),
+                "ic_inf": ic_inf,
+                "ic_sup": ic_sup,
+            })
+    return linhas
+
+
+# --- Execução paralela da grade ---
+# Um único pool por processo, criado no primeiro backtest grande e reaproveitado
+_pool = None
+_pool_lock = threading.Lock()
+
+def _obter_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=os.cpu_count() or 1)
+        return _pool
+
+def _descartar_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+def executar(dados, grade, processos=None, lote=16):
+    """
+    Avalia a grade de regras e retorna um DataFrame ordenado pela taxa de acerto.
+    Grades pequenas rodam no próprio processo; as grandes são divididas em um lote
+    contíguo por processo (no máximo len(grade) / lote processos, limitado a `processos`
+    ou ao número de CPUs), então os arrays são enviados uma vez para cada processo.
+    """
+    processos = min(processos or os.cpu_count() or 1, math.ceil(len(grade) / lote))
+    if processos <= 1 or len(dados["competicao"]) * len(grade) < PARALELO_MIN:
+        linhas = avaliar(dados, grade)
+    else:
+        tamanho = math.ceil(len(grade) / processos)
+        lotes = [grade[i:i + tamanho] for i in range(0, len(grade), tamanho)]
+        try:
+            resultados = _obter_pool().map(avaliar, [dados] * len(lotes), lotes)
+            linhas = [l for resultado in resultados for l in resultado]
+        except BrokenProcessPool:
+            _descartar_pool()  # o próximo backtest cria um pool novo
+            linhas = avaliar(dados, grade)
+    df = pd.DataFrame(linhas)
+    if not df.empty:
+        df = df.sort_values(by=["taxa", "ocorrencias"], ascending=[False, False], na_position="last")
+    return df
+
+
+def sequencias(dados, coluna="Ambos Marcam"):
+    """
+    Distribuição dos tamanhos de sequência de Sim e Não na coluna.
+    """
+    arr = dados["colunas"][coluna]
+    return {v: distribuicao_sequencias(arr, CODIGOS[v]) for v in CODIGOS}
+
+
+def rodar(inicio, fim, colunas=("Ambos Marcam",), k_max=5, processos=None):
+    """
+    Atalho usado pelo dashboard: carrega o período, roda a grade e calcula as sequências.
+    """
+    dados = carregar_historico(inicio, fim)
+    grade = gerar_grade(colunas, range(1, k_max + 1))
+    return executar(dados, grade, processos), {c: sequencias(dados, c) for c in colunas}
+
+
+if __name__ == "__main__":
+    import sys
+
+    inicio = datetime.strptime(sys.argv[1], "%Y-%m-%d")
+    fim = datetime.strptime(sys.argv[2], "%Y-%m-%d") if len(sys.argv) > 2 else inicio
+    df, seqs = rodar(inicio, fim, COLUNAS)
+    print(df[df["Competição"] == "Todas"].head(20).to_string(index=False))
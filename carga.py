@@ -0,0 +1,267 @@
+"""
+Teste de carga do dashboard.
+
+Sobe o dashboard.py contra um historico/ sintético, conecta N clientes websocket
+simulados (protocolo socket.io do NiceGUI), grava resultados no ritmo de produção e
+mede, para cada N: CPU do servidor, duração dos ticks de update_dashboard, atraso do
+event loop, tamanho dos payloads recebidos por cliente (JSON serializado, não o tráfego
+de rede) e latência entre gravar um resultado e ele chegar nos clientes.
+
+Uso:
+    python carga.py --clientes 1,5,10,20 --duracao 30 --relatorio carga_relatorio.json
+
+Dependências: pip install -r requirements-dev.txt
+"""
+import argparse
+import ast
+import asyncio
+import json
+import os
+import random
+import re
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+import warnings
+from datetime import datetime
+from pathlib import Path
+from urllib.parse import urlencode
+
+import aiohttp
+import pandas as pd
+import psutil
+import socketio
+
+ROOT = Path(__file__).resolve().parent
+COMPETITIONS = ["Euro Cup", "Premier League", "Sul Americano", "Copa do Mundo"]
+CADENCIA = 3  # minutos entre jogos de uma competição
+SLOTS_DIA = 24 * 60  # = grade.SLOTS; grade importa particoes, que só pode vir depois de BET_HISTORY_DIR
+
+
+# --- Dados sintéticos ---
+def gerar_historico(history_dir, linhas_por_comp):
+    """
+    Cria as partições de hoje com `linhas_por_comp` jogos por competição a partir das 00:00.
+    BET_HISTORY_DIR já deve estar definido (ver main).
+    """
+    import catalogo
+    import padroes
+    import particoes
+
+    hoje = datetime.now()
+    date_str = hoje.strftime('%d/%m/%Y')
+    for comp in COMPETITIONS:
+        slots = [i * CADENCIA for i in range(linhas_por_comp)]
+        df = pd.DataFrame({
+            "Data": date_str,
+            "Competição": comp,
+            "Hora": [s // 60 for s in slots],
+            "Minuto": [s % 60 for s in slots],
+            "Ambos Marcam": [random.choice(["Sim", "Não"]) for _ in slots],
+        })
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            df = padroes.calcular_padroes(df)
+        path = particoes.get_partition_path(hoje, comp)
+        path.parent.mkdir(exist_ok=True)
+        df.to_csv(path, index=False, encoding='utf-8-sig')
+    catalogo.reconstruir()
+
+
+class Gravador:
+    """
+    Grava novos resultados (um por competição a cada CADENCIA minutos em produção;
+    `aceleracao` comprime esse tempo) usando o mesmo caminho de escrita do scraper.
+    Para no último slot do dia (23:59): a grade não tem slots além disso.
+    """
+    def __init__(self, linhas_por_comp, aceleracao):
+        import persistencia
+        self.persistencia = persistencia
+        self.proximo_slot = linhas_por_comp * CADENCIA
+        self.intervalo = CADENCIA * 60 / len(COMPETITIONS) / aceleracao
+        self.gravados = []  # (hora, minuto, timestamp)
+        self.indice = 0
+
+    async def rodar(self):
+        while True:
+            await asyncio.sleep(self.intervalo)
+            comp = COMPETITIONS[self.indice % len(COMPETITIONS)]
+            self.indice += 1
+            if comp == COMPETITIONS[0]:
+                self.proximo_slot += CADENCIA
+                if self.proximo_slot >= SLOTS_DIA:
+                    print("⏹️ Gravador chegou ao fim do dia sintético; sem novas gravações.")
+                    return
+            h, m = divmod(self.proximo_slot, 60)
+            await self.persistencia.save_match_data(comp, datetime.now().strftime('%d/%m/%Y'), h, m, random.choice(["Sim", "Não"]))
+            if comp == COMPETITIONS[0]:
+                self.gravados.append((h, m, time.monotonic()))
+
+
+# --- Cliente simulado ---
+def _contem_linha(obj, h, m):
+    if isinstance(obj, dict):
+        if obj.get('Hora') == h and obj.get('Minuto') == m and obj.get('Competição') == COMPETITIONS[0]:
+            return True
+        return any(_contem_linha(v, h, m) for v in obj.values())
+    if isinstance(obj, list):
+        return any(_contem_linha(v, h, m) for v in obj)
+    return False
+
+
+class ClienteSimulado:
+    def __init__(self, url, gravador):
+        self.url = url
+        self.gravador = gravador
+        self.payload = 0  # bytes do JSON serializado das mensagens (não inclui framing/compressão)
+        self.mensagens = 0
+        self.latencias = []
+        self.vistos = set()
+        self.sio = socketio.AsyncClient(reconnection=False)
+        self.sio.on('*', self._on_mensagem)
+
+    async def _on_mensagem(self, evento, dados=None):
+        self.mensagens += 1
+        self.payload += len(json.dumps(dados, ensure_ascii=False).encode("utf-8")) if dados is not None else 0
+        agora = time.monotonic()
+        for h, m, t in self.gravador.gravados:
+            if (h, m) not in self.vistos and _contem_linha(dados, h, m):
+                self.vistos.add((h, m))
+                self.latencias.append(agora - t)
+
+    async def conectar(self, session):
+        # O HTML da página traz os parâmetros do handshake (client_id etc.) como dict Python
+        async with session.get(self.url + "/") as resp:
+            html = await resp.text()
+        query = ast.literal_eval(re.search(r"query: (\{.*?\}),\n", html).group(1))
+        query.update(tab_id=str(uuid.uuid4()), document_id=str(uuid.uuid4()))
+        query = {k: str(v).lower() if isinstance(v, bool) else v for k, v in query.items()}
+        await self.sio.connect(f"{self.url}?{urlencode(query)}", socketio_path="/_nicegui_ws/socket.io",
+                               transports=["websocket"])
+
+    async def fechar(self):
+        await self.sio.disconnect()
+
+
+# --- Execução ---
+async def esperar_servidor(url, timeout=60):
+    limite = time.monotonic() + timeout
+    async with aiohttp.ClientSession() as session:
+        while time.monotonic() < limite:
+            try:
+                async with session.get(url + "/api/metricas") as resp:
+                    if resp.status == 200:
+                        return
+            except aiohttp.ClientError:
+                pass
+            await asyncio.sleep(0.5)
+    raise RuntimeError("dashboard não respondeu")
+
+
+async def medir(url, processo, clientes, gravador, duracao):
+    async with aiohttp.ClientSession() as session:
+        async with session.get(url + "/api/metricas", params={"reset": "true"}) as resp:
+            await resp.json()
+        payload_antes = [c.payload for c in clientes]
+        lat_antes = [len(c.latencias) for c in clientes]
+        processo.cpu_percent(None)
+
+        await asyncio.sleep(duracao)
+
+        cpu = processo.cpu_percent(None)
+        async with session.get(url + "/api/metricas", params={"reset": "true"}) as resp:
+            servidor = await resp.json()
+
+    latencias = sorted(l for c, n in zip(clientes, lat_antes) for l in c.latencias[n:])
+    payload_cliente = [(c.payload - b) / duracao for c, b in zip(clientes, payload_antes)]
+    return {
+        "clientes": len(clientes),
+        "cpu_servidor_pct": round(cpu, 1),
+        "rss_servidor_mb": round(processo.memory_info().rss / 1024 / 1024, 1),
+        "tick_media_ms": servidor["tick_media_ms"],
+        "tick_p95_ms": servidor["tick_p95_ms"],
+        "tick_max_ms": servidor["tick_max_ms"],
+        "ticks": servidor["ticks"],
+        "loop_lag_p95_ms": servidor.get("loop_lag_p95_ms"),
+        "loop_lag_max_ms": servidor.get("loop_lag_max_ms"),
+        "payload_json_por_cliente_s": round(sum(payload_cliente) / len(payload_cliente)) if payload_cliente else 0,
+        "latencia_media_s": round(sum(latencias) / len(latencias), 2) if latencias else None,
+        "latencia_max_s": round(latencias[-1], 2) if latencias else None,
+        "amostras_latencia": len(latencias),
+    }
+
+
+async def executar(args, history_dir):
+    porta = args.porta
+    url = f"http://127.0.0.1:{porta}"
+    env = {**os.environ, "BET_HISTORY_DIR": str(history_dir), "DASHBOARD_PORT": str(porta)}
+    servidor = subprocess.Popen([sys.executable, str(ROOT / "dashboard.py")], cwd=str(ROOT), env=env,
+                                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    clientes = []
+    resultados = []
+    tarefa_gravador = None
+    try:
+        await esperar_servidor(url)
+        processo = psutil.Process(servidor.pid)
+        gravador = Gravador(args.linhas, args.aceleracao)
+        tarefa_gravador = asyncio.create_task(gravador.rodar())
+
+        async with aiohttp.ClientSession() as session:
+            for n in args.clientes:
+                while len(clientes) < n:
+                    cliente = ClienteSimulado(url, gravador)
+                    await cliente.conectar(session)
+                    clientes.append(cliente)
+                await asyncio.sleep(args.aquecimento)
+                resultado = await medir(url, processo, clientes, gravador, args.duracao)
+                resultados.append(resultado)
+                print(f"N={n:>4} | CPU {resultado['cpu_servidor_pct']:>6}% | tick p95 {resultado['tick_p95_ms']} ms"
+                      f" | lag do loop p95 {resultado['loop_lag_p95_ms']} ms"
+                      f" | payload {resultado['payload_json_por_cliente_s']} B/s por cliente | latência {resultado['latencia_media_s']} s")
+    finally:
+        if tarefa_gravador:
+            tarefa_gravador.cancel()
+        for c in clientes:
+            try: await c.fechar()
+            except Exception: pass
+        servidor.terminate()
+        servidor.wait(timeout=10)
+    return resultados
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Teste de carga do dashboard")
+    parser.add_argument("--clientes", default="1,5,10,20", help="Números de clientes simultâneos, em ordem crescente")
+    parser.add_argument("--duracao", type=float, default=30, help="Segundos de medição por etapa")
+    parser.add_argument("--aquecimento", type=float, default=5, help="Segundos antes de medir cada etapa")
+    parser.add_argument("--linhas", type=int, default=300, help="Jogos sintéticos por competição")
+    parser.add_argument("--aceleracao", type=float, default=1, help="Multiplica o ritmo de gravação de produção")
+    parser.add_argument("--porta", type=int, default=8765)
+    parser.add_argument("--relatorio", default="carga_relatorio.json")
+    args = parser.parse_args()
+    args.clientes = [int(n) for n in args.clientes.split(",")]
+    # O histórico começa às 00:00 e o gravador continua dele: precisa sobrar pelo menos um slot no dia
+    max_linhas = SLOTS_DIA // CADENCIA - 1
+    if not 0 < args.linhas <= max_linhas:
+        parser.error(f"--linhas deve estar entre 1 e {max_linhas} (jogos a cada {CADENCIA} min em um dia)")
+
+    with tempfile.TemporaryDirectory(prefix="bet_carga_") as tmp:
+        history_dir = Path(tmp)
+        os.environ["BET_HISTORY_DIR"] = str(history_dir)  # antes de importar particoes/persistencia
+        gerar_historico(history_dir, args.linhas)
+        resultados = asyncio.run(executar(args, history_dir))
+
+    relatorio = {
+        "data": datetime.now().isoformat(timespec='seconds'),
+        "parametros": {k: v for k, v in vars(args).items() if k != "relatorio"},
+        "etapas": resultados,
+    }
+    with open(args.relatorio, "w", encoding="utf-8") as fp:
+        json.dump(relatorio, fp, ensure_ascii=False, indent=2)
+    print(f"✅ Relatório salvo em {args.relatorio}")
+
+
+if __name__ == "__main__":
+    main()
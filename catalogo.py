@@ -0,0 +1,207 @@
+import hashlib
+import json
+import os
+import threading
+from datetime import datetime
+
+import numpy as np
+
+import grade
+import lacunas
+import padroes
+import particoes
+
+# ==========================
+# Catálogo de historico/: um resumo por dia (linhas por competição, primeiro/último jogo,
+# slots faltantes, checksum e versão dos padrões). Atualizado a cada escrita e
+# reconstruído sob demanda (python catalogo.py), para que o dashboard não precise
+# varrer nem ler os CSVs para listar datas.
+# Arquivos legados (matches_DD-MM-YYYY.csv) ainda são escritos por outros escritores
+# (scraper.js) que não passam por aqui: os leitores (atualizado()) catalogam os dias que
+# aparecerem em historico/, mas só quando o mtime da pasta muda. Linhas novas num legado
+# já catalogado só entram na reconstrução (python catalogo.py).
+# ==========================
+HISTORY_DIR = particoes.HISTORY_DIR
+CATALOGO_PATH = HISTORY_DIR / "catalogo.json"
+
+# Escritores de partições diferentes atualizam o catálogo em threads diferentes
+_lock = threading.Lock()
+
+# mtime de historico/ na última conciliação deste processo
+_mtime_conciliado = None
+
+
+def resumo_competicao(df_comp):
+    # Cadência e faltantes pela mesma regra das lacunas do dashboard e da recoleta (lacunas.py)
+    arr = grade.codificar(df_comp)
+    jogos = np.flatnonzero(arr != grade.SEM_JOGO)
+    inicio, fim = int(jogos[0]), int(jogos[-1])
+    return {
+        "linhas": int(len(df_comp)),
+        "inicio": f"{inicio // 60:02d}:{inicio % 60:02d}",
+        "fim": f"{fim // 60:02d}:{fim % 60:02d}",
+        "cadencia": lacunas.cadencia(arr),
+        "faltantes": int(len(lacunas.detectar(arr))),
+    }
+
+
+def _checksum(path):
+    return hashlib.sha1(path.read_bytes()).hexdigest()
+
+
+def _fechar_entrada(entrada):
+    """
+    Recalcula os totais do dia a partir das competições.
+    """
+    comps = entrada["competicoes"]
+    entrada["linhas"] = sum(c["linhas"] for c in comps.values())
+    entrada["checksum"] = hashlib.sha1("".join(comps[c].get("checksum", "") for c in sorted(comps)).encode()).hexdigest()
+    return entrada
+
+
+def resumo_dia(date):
+    """
+    Resumo completo de um dia lendo todos os seus arquivos (usado na reconstrução).
+    """
+    entrada = {"data": date.strftime("%Y-%m-%d"), "competicoes": {}, "versao_padroes": None}
+    for f in particoes.day_files(date):
+        df = particoes.ler_arquivo(f)
+        if df.empty: continue
+        if all(p in df.columns for p in padroes.COLUNAS_PADROES):
+            entrada["versao_padroes"] = padroes.VERSAO_PADROES
+        checksum = _checksum(f)
+        for comp, df_comp in df.groupby('Competição', observed=True):
+            entrada["competicoes"][comp] = {**resumo_competicao(df_comp), "checksum": checksum}
+    return _fechar_entrada(entrada)
+
+
+def _salvar(catalogo):
+    def escrever(tmp):
+        with open(tmp, "w", encoding="utf-8") as fp:
+            json.dump(catalogo, fp, ensure_ascii=False, indent=1)
+    particoes.publicar(CATALOGO_PATH, escrever)
+
+
+def _ler():
+    with open(CATALOGO_PATH, "r", encoding="utf-8") as fp:
+        return json.load(fp)
+
+
+def conciliar(catalogo):
+    """
+    Entradas a trocar para o catálogo refletir os dias em historico/: {chave: resumo}
+    para dias que faltam e {chave: None} para dias que não existem mais. Os nomes
+    da pasta são comparados com os do catálogo; só os dias novos são lidos.
+    """
+    nomes = set(os.listdir(HISTORY_DIR))
+    mudancas = {}
+    conhecidos = set()
+    for chave in catalogo:
+        ano, mes, dia = chave.split("-")
+        pasta = f"{dia}-{mes}-{ano}"
+        conhecidos.update((pasta, f"matches_{pasta}.csv"))
+        if pasta not in nomes and f"matches_{pasta}.csv" not in nomes:
+            mudancas[chave] = None
+    for nome in nomes - conhecidos:
+        try:
+            date = datetime.strptime(nome.removeprefix("matches_").removesuffix(".csv"), particoes.FORMATO_DIA)
+        except ValueError:
+            continue
+        try:
+            mudancas[date.strftime("%Y-%m-%d")] = resumo_dia(date)
+        except Exception as e:
+            print(f"⚠️ Erro ao catalogar {date.strftime('%d-%m-%Y')}: {e}")
+    return mudancas
+
+
+def carregar():
+    """
+    Retorna {"YYYY-MM-DD": resumo} como está em catalogo.json (reconstrói se ainda não existir).
+    """
+    if CATALOGO_PATH.exists():
+        try:
+            return _ler()
+        except Exception as e:
+            print(f"⚠️ Catálogo ilegível ({e}). Reconstruindo...")
+    return reconstruir()
+
+
+def atualizado():
+    """
+    Catálogo para leitores (dashboard, exportação, backtest): carregar() mais os dias que
+    apareceram ou sumiram de historico/. A pasta só é listada quando o mtime dela muda.
+    """
+    global _mtime_conciliado
+    catalogo = carregar()
+    try:
+        mtime = HISTORY_DIR.stat().st_mtime_ns
+    except OSError:
+        return catalogo
+    if mtime == _mtime_conciliado:
+        return catalogo
+    mudancas = conciliar(catalogo)
+    if mudancas:
+        with _lock:
+            # Relê antes de gravar para não desfazer uma atualização feita no meio tempo
+            catalogo = _ler()
+            for chave, entrada in mudancas.items():
+                if entrada is None:
+                    catalogo.pop(chave, None)
+                else:
+                    catalogo[chave] = entrada
+            _salvar(catalogo)
+        mtime = HISTORY_DIR.stat().st_mtime_ns  # a própria gravação muda o mtime
+    _mtime_conciliado = mtime
+    return catalogo
+
+
+def atualizar_particao(date, comp_name, csv_path, df, versao_padroes=None):
+    """
+    Atualiza só a competição escrita. Chamado pelo escritor logo após salvar a partição.
+    """
+    resumo = {**resumo_competicao(df), "checksum": _checksum(csv_path)}
+    chave = date.strftime("%Y-%m-%d")
+    with _lock:
+        catalogo = carregar()
+        entrada = catalogo.setdefault(chave, {"data": chave, "competicoes": {}, "versao_padroes": None})
+        entrada["competicoes"][comp_name] = resumo
+        if versao_padroes is not None:
+            entrada["versao_padroes"] = versao_padroes
+        _fechar_entrada(entrada)
+        _salvar(catalogo)
+
+
+def atualizar_dia(date):
+    """
+    Recalcula a entrada inteira de um dia (ex: após padroes.atualizar_arquivo_hoje).
+    """
+    entrada = resumo_dia(date)
+    with _lock:
+        catalogo = carregar()
+        catalogo[entrada["data"]] = entrada
+        _salvar(catalogo)
+
+
+def reconstruir():
+    catalogo = {}
+    for date in particoes.list_days():
+        try:
+            entrada = resumo_dia(date)
+            catalogo[entrada["data"]] = entrada
+        except Exception as e:
+            print(f"⚠️ Erro ao catalogar {date.strftime('%d-%m-%Y')}: {e}")
+    _salvar(catalogo)
+    return catalogo
+
+
+def datas(catalogo=None):
+    """
+    Datas catalogadas (YYYY-MM-DD), da mais recente para a mais antiga.
+    """
+    catalogo = catalogo if catalogo is not None else atualizado()
+    return sorted(catalogo.keys(), reverse=True)
+
+
+if __name__ == "__main__":
+    catalogo = reconstruir()
+    print(f"✅ Catálogo reconstruído: {len(catalogo)} dias em {CATALOGO_PATH}")
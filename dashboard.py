@@ -1,15 +1,31 @@
-from nicegui import ui, app
+from nicegui import ui, app, Client, background_tasks
+import numpy as np
 import pandas as pd
 import subprocess
 import json
+import os
 import time
 from pathlib import Path
 from datetime import datetime
 import asyncio
 import sys
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 
 # --- IMPORTAÇÃO DE MÓDULOS ---
+import backtest
+import catalogo
+import exportar
+import grade
+import lacunas
+import markov
+import mercados
+import metricas
 import padroes
+import particoes
+import registro
+import rollups
 
 # ==========================
 # CONFIGURATION
@@ -17,16 +33,28 @@ import padroes
 ROOT = Path(__file__).resolve().parent
 CONFIG_PATH = ROOT / "config.json"
 APP_SCRIPT = ROOT / "scraper.js"
+PORT = int(os.environ.get("DASHBOARD_PORT", 8080))
+
+# Duração dos ticks de update_dashboard e atraso do event loop (expostos em /api/metricas)
+tick_durations = deque(maxlen=1000)
+loop_lags = deque(maxlen=5000)
+
+# Acompanha logs/*.jsonl e logs/*.log escritos pelo scraper (compartilhado entre as abas
+# abertas; atualizado por uma única task, fora do event loop)
+seguidor_logs = registro.Seguidor()
+LOGS_INTERVALO = 1.0
 
 # Global State
 class State:
     def __init__(self):
         self.process = None
         self.process_pid = None
+        self.running = False  # último resultado de is_process_running (atualizado fora do event loop)
         self.config = {}
         self.load_config()
         self.selected_date = datetime.now().strftime('%Y-%m-%d')
         self.selected_pattern = "Resultados"
+        self.selected_market = mercados.PRINCIPAL
         self.lookback_hours = 5
         self.last_csv_hash = None
         self.df = pd.DataFrame()
@@ -96,8 +124,13 @@ class State:
         except:
             return False
 
+    async def check_process(self):
+        # tasklist bloqueia: roda no pool e guarda o resultado para todas as páginas
+        self.running = await asyncio.get_running_loop().run_in_executor(_executor, self.is_process_running)
+        return self.running
+
     async def start_process(self):
-        if self.is_process_running():
+        if await self.check_process():
             ui.notify("Automação já está rodando!", type="warning")
             return
 
@@ -106,21 +139,28 @@ class State:
         try:
             # Using Popen to start independent process
             # [CHANGED] Use 'node' instead of sys.executable
-            self.process = subprocess.Popen(
-                ["node", str(APP_SCRIPT)],
-                cwd=str(ROOT),
-                creationflags=subprocess.CREATE_NEW_CONSOLE
-            )
+            # stdout/stderr vão para logs/scraper.log (aba Logs); o arquivo fica com o processo
+            with registro.abrir_saida(APP_SCRIPT.stem) as saida:
+                self.process = subprocess.Popen(
+                    ["node", str(APP_SCRIPT)],
+                    cwd=str(ROOT),
+                    stdout=saida,
+                    stderr=subprocess.STDOUT,
+                    creationflags=subprocess.CREATE_NEW_CONSOLE
+                )
             self.process_pid = self.process.pid
+            self.running = True
             ui.notify(f"Iniciado! PID: {self.process_pid}", type="positive")
         except Exception as e:
             ui.notify(f"Erro ao iniciar: {e}", type="negative")
 
     async def stop_process(self):
-        if self.process_pid and self.is_process_running():
+        if self.process_pid and await self.check_process():
             try:
-                subprocess.run(["taskkill", "/F", "/PID", str(self.process_pid)])
+                await asyncio.get_running_loop().run_in_executor(
+                    _executor, partial(subprocess.run, ["taskkill", "/F", "/PID", str(self.process_pid)]))
                 self.process_pid = None
+                self.running = False
                 ui.notify("Parado.", type="positive")
             except Exception as e:
                 ui.notify(f"Erro ao parar: {e}", type="negative")
@@ -129,11 +169,297 @@ class State:
 
 state = State()
 
+# ==========================
+# BACKTEST TAB
+# ==========================
+def backtest_panel(dates):
+    params = {
+        'inicio': dates[-1] if dates else state.selected_date,
+        'fim': dates[0] if dates else state.selected_date,
+        'colunas': ['Ambos Marcam'],
+        'k_max': 5,
+    }
+
+    with ui.column().classes('w-full q-pa-md'):
+        ui.label('Backtest de Regras').classes('text-h5')
+        ui.label('Regra: após k resultados consecutivos iguais ao gatilho, o próximo é o alvo.').classes('text-grey')
+        with ui.row().classes('items-end'):
+            ui.input('Início (AAAA-MM-DD)').bind_value(params, 'inicio')
+            ui.input('Fim (AAAA-MM-DD)').bind_value(params, 'fim')
+            ui.select(backtest.COLUNAS, multiple=True, label='Colunas').bind_value(params, 'colunas').classes('min-w-[200px]')
+            ui.number('k máximo', min=1, max=10).bind_value(params, 'k_max')
+            run_button = ui.button('Rodar', icon='science')
+        status = ui.label('')
+        results_container = ui.column().classes('w-full')
+
+    async def run_backtest():
+        try:
+            inicio = datetime.strptime(params['inicio'], '%Y-%m-%d')
+            fim = datetime.strptime(params['fim'], '%Y-%m-%d')
+        except ValueError:
+            ui.notify('Datas inválidas!', type='warning')
+            return
+        run_button.disable()
+        status.text = 'Rodando...'
+        try:
+            # Roda fora do event loop; grades grandes usam o pool de processos do backtest (reaproveitado)
+            loop = asyncio.get_running_loop()
+            df, seqs = await loop.run_in_executor(None, backtest.rodar, inicio, fim, tuple(params['colunas']), int(params['k_max']))
+        except Exception as e:
+            ui.notify(f'Erro no backtest: {e}', type='negative')
+            return
+        finally:
+            run_button.enable()
+            status.text = ''
+
+        results_container.clear()
+        with results_container:
+            if df.empty:
+                ui.label('Nenhum dado no período.').classes('text-grey')
+                return
+            df = df.round({'taxa': 3, 'ic_inf': 3, 'ic_sup': 3})
+            cols = ['coluna', 'k', 'gatilho', 'alvo', 'Competição', 'ocorrencias', 'acertos', 'taxa', 'ic_inf', 'ic_sup']
+            columns = [{'name': c, 'label': c, 'field': c, 'sortable': True} for c in cols]
+            ui.table(columns=columns, rows=df[cols].fillna('').to_dict('records'), pagination=15).classes('w-full')
+
+            ui.label('Distribuição de Sequências').classes('text-h6 q-mt-md')
+            for coluna, dist in seqs.items():
+                for valor, contagem in dist.items():
+                    texto = ', '.join(f'{t}: {n}' for t, n in contagem.items())
+                    ui.label(f'{coluna} / {valor} → {texto}')
+
+    run_button.on_click(run_backtest)
+
+# ==========================
+# LOGS TAB
+# ==========================
+def logs_panel():
+    comps = state.config.get("COMPETITIONS", ["Euro Cup", "Premier League", "Sul Americano", "Copa do Mundo"])
+    filtros = {'competicao': 'Todas', 'nivel': 'INFO'}
+    ultimo = {'seq': 0}
+
+    def linha(r):
+        return f"{r['ts'][11:]} {r['nivel']:<7} [{r.get('processo', '')}] {r['msg'].strip()}"
+
+    def mostrar(registros):
+        comp = None if filtros['competicao'] == 'Todas' else filtros['competicao']
+        for r in registro.filtrar(registros, comp, filtros['nivel'])[-500:]:
+            log_view.push(linha(r))
+
+    def recarregar():
+        log_view.clear()
+        ultimo['seq'] = 0
+        tick()
+
+    def filtrar(chave, valor):
+        filtros[chave] = valor
+        recarregar()
+
+    def tick():
+        # Só lê o anel em memória; os arquivos são lidos por acompanhar_logs
+        novos = seguidor_logs.desde(ultimo['seq'])
+        if novos:
+            ultimo['seq'] = novos[-1]['seq']
+            mostrar(novos)
+
+    with ui.column().classes('w-full q-pa-md'):
+        ui.label('Logs do Scraper').classes('text-h5')
+        with ui.row().classes('items-end'):
+            ui.select(['Todas'] + comps, value=filtros['competicao'], label='Competição',
+                      on_change=lambda e: filtrar('competicao', e.value)).classes('min-w-[200px]')
+            ui.select(registro.NIVEIS[1:], value=filtros['nivel'], label='Nível mínimo',
+                      on_change=lambda e: filtrar('nivel', e.value)).classes('min-w-[150px]')
+        log_view = ui.log(max_lines=500).classes('w-full h-[600px]')
+
+    recarregar()
+    ui.timer(LOGS_INTERVALO, tick)
+
 # ==========================
 # UI LAYOUT
 # ==========================
+# ==========================
+# DATA PROCESSING (fora do event loop)
+# ==========================
+# Leitura do dia, padrões, rollups e montagem do HTML rodam num pool de threads; no event
+# loop do NiceGUI fica só a troca dos elementos da página. Páginas que pedem a mesma chave
+# (ex.: mesma data e versão do dia) compartilham o cálculo em andamento e o resultado.
+PROCESSAMENTO_WORKERS = 2
+RESULTADOS_EM_CACHE = 16
+
+_executor = ThreadPoolExecutor(max_workers=PROCESSAMENTO_WORKERS, thread_name_prefix="dashboard")
+_em_andamento = {}
+_resultados = OrderedDict()
+
+
+def _concluido(chave, futuro):
+    _em_andamento.pop(chave, None)
+    # None (dados ainda inutilizáveis) também não fica em cache: o próximo tick tenta de novo
+    if not futuro.cancelled() and futuro.exception() is None and futuro.result() is not None:
+        _resultados[chave] = futuro.result()
+        while len(_resultados) > RESULTADOS_EM_CACHE:
+            _resultados.popitem(last=False)
+
+
+async def compartilhado(chave, funcao, *args):
+    """
+    Resultado de funcao(*args) para a chave: do cache, de um cálculo já em andamento para
+    a mesma chave ou de um cálculo novo no pool. Erros e None não ficam em cache.
+    """
+    if chave in _resultados:
+        _resultados.move_to_end(chave)
+        return _resultados[chave]
+    futuro = _em_andamento.get(chave)
+    if futuro is None:
+        futuro = asyncio.get_running_loop().run_in_executor(_executor, funcao, *args)
+        _em_andamento[chave] = futuro
+        futuro.add_done_callback(partial(_concluido, chave))
+    # shield: uma página fechada no meio não cancela o cálculo das outras
+    return await asyncio.shield(futuro)
+
+
+def taxa_html(sim, total):
+    texto = f"{100 * sim / total:.0f}% ({sim}/{total})" if total else ''
+    return f'<td style="font-weight:bold; border: 1px solid #444; padding: 4px;">{texto}</td>'
+
+
+def montar_markov():
+    # Só lê historico/markov.json (relido apenas quando muda)
+    modelo = markov.carregar()
+    hora = datetime.now().hour
+    cell = 'border: 1px solid #444; padding: 4px;'
+    html = '<table style="width:100%; border-collapse: collapse; text-align: center;">'
+    html += f'<thead><tr><th style="{cell}">Competição</th><th style="{cell}">Últimos</th><th style="{cell}"></th>'
+    for k in range(modelo['k_max'] + 1):
+        html += f'<th style="{cell}">k={k}</th>'
+    html += '</tr></thead><tbody>'
+    for comp in sorted(modelo['contagens']):
+        contexto = modelo['ultimos'].get(comp, {}).get('contexto', '')
+        for i, (rotulo, h) in enumerate([('Geral', None), (f'{hora:02d}h', hora)]):
+            html += '<tr>'
+            if i == 0:
+                html += f'<td rowspan="2" style="font-weight:bold; {cell}">{comp}</td><td rowspan="2" style="{cell}">{contexto}</td>'
+            html += f'<td style="{cell}">{rotulo}</td>'
+            for k in range(modelo['k_max'] + 1):
+                html += taxa_html(*markov.probabilidade(modelo, comp, contexto, k, h))
+            html += '</tr>'
+    html += '</tbody></table>'
+    return html
+
+
+def processar_dia(selected_date, selected_market, selected_pattern):
+    """
+    Monta os dados da aba 'Ao Vivo' para um dia (roda no pool de threads).
+    Retorna {'vazio': 'DD-MM-YYYY'}, None (dados ainda inutilizáveis) ou
+    {'cards': [{'comp', 'lacunas', 'horarios', 'html'}], 'colunas': [...], 'linhas': [...]}.
+    """
+    d = datetime.strptime(selected_date, '%Y-%m-%d')
+    if not particoes.day_files(d):
+        return {'vazio': d.strftime('%d-%m-%Y')}
+
+    # Merged view of the day's partitions (published atomically, never half-written)
+    # (já tipada por esquema.py: Hora/Minuto int8, resultados categóricos)
+    df = particoes.ler_dia(d)
+    if df is None:
+        return None
+
+    # Check required columns
+    if 'Ambos Marcam' not in df.columns:
+        return None
+
+    # Calculate Patterns (Suppress FutureWarning if any)
+    import warnings
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        df = padroes.calcular_padroes(df)
+        mercado = selected_market
+        if mercado != mercados.PRINCIPAL and mercado in df.columns:
+            df = padroes.calcular_padroes(df, mercado)
+        else:
+            mercado = mercados.PRINCIPAL
+
+    # Contadores por hora (mantidos pelo scraper); dias antigos sem rollup são construídos aqui
+    rollup = rollups.carregar_dia(d)
+    if rollup is None:
+        rollup = rollups.construir(df)
+
+    cards = []
+    for comp in df['Competição'].unique():
+        df_comp = df[df['Competição'] == comp]
+        resultados = grade.codificar(df_comp)
+
+        gaps = lacunas.detectar(resultados)
+        horarios = ', '.join(f"{s // 60:02d}:{s % 60:02d}" for s in gaps[:10]) + (' ...' if len(gaps) > 10 else '')
+        card = {'comp': comp, 'lacunas': len(gaps), 'horarios': horarios, 'html': None}
+        cards.append(card)
+        if df_comp.empty: continue
+
+        col_val = mercado if selected_pattern == "Resultados" \
+            else padroes.colunas_padroes(mercado).get(selected_pattern, mercado)
+        if col_val not in df_comp.columns: col_val = 'Ambos Marcam'
+
+        # Grade de slots do dia: matriz Hora x Minuto por reshape (sem pivot)
+        jogos = grade.matriz(resultados)
+        matrix = grade.matriz(grade.posicionar(df_comp, col_val))
+        horas = np.flatnonzero((jogos != grade.SEM_JOGO).any(axis=1))[::-1]
+        minutos = np.flatnonzero((jogos != grade.SEM_JOGO).any(axis=0))
+
+        # Custom HTML Table Builder
+        html = '<table style="width:100%; border-collapse: collapse; text-align: center;">'
+
+        # Header
+        html += '<thead><tr><th>Hora</th>'
+        for col in minutos:
+            html += f'<th style="padding: 4px; border: 1px solid #444;">{col}</th>'
+        html += '<th style="padding: 4px; border: 1px solid #444;">% Sim</th>'
+        html += '</tr></thead><tbody>'
+
+        # Rows
+        for idx in horas:
+            html += f'<tr><td style="font-weight:bold; border: 1px solid #444;">{idx}</td>'
+            for col in minutos:
+                valor = matrix[idx, col]
+                color = '#fff'
+                if valor == 'Sim':
+                    bg_color = '#28a745'
+                elif valor == 'Não':
+                    bg_color = '#dc3545'
+                elif valor is None:
+                    bg_color = '#333'
+                else:
+                    bg_color = '#6c757d'  # valor de outro mercado (ex.: placar)
+
+                display_val = valor if valor is not None else ''
+                html += f'<td style="background-color: {bg_color}; color: {color}; border: 1px solid #444; padding: 4px;">{display_val}</td>'
+            html += taxa_html(*rollups.taxa_sim(rollup, comp, idx, col_val))
+            html += '</tr>'
+
+        # Linha de resumo do dia
+        html += '<tr><td style="font-weight:bold; border: 1px solid #444;">Dia</td>'
+        html += f'<td colspan="{len(minutos)}" style="border: 1px solid #444;"></td>'
+        html += taxa_html(*rollups.taxa_sim(rollup, comp, None, col_val))
+        html += '</tr>'
+        html += '</tbody></table>'
+        card['html'] = html
+
+    # General Table
+    cols_to_show = ['Data', 'Competição', 'Hora', 'Minuto', 'Ambos Marcam']
+    for p in ['5x', '4x', '3x', '2x', '1x']:
+        if p in df.columns: cols_to_show.append(p)
+    if mercado != mercados.PRINCIPAL:
+        nomes = padroes.colunas_padroes(mercado)
+        cols_to_show += [mercado] + [nomes[p] for p in padroes.COLUNAS_PADROES]
+
+    df_sorted = df[cols_to_show].sort_values(by=['Hora', 'Minuto'], ascending=[False, False])
+
+    # Convert to list of dicts for ui.table
+    return {'cards': cards, 'colunas': cols_to_show, 'linhas': df_sorted.to_dict('records')}
+
+
 @ui.page('/')
-def main_page():
+async def main_page():
+    # Datas do catálogo (pode conciliar com historico/): lidas uma vez, no pool, para as duas abas
+    dates = await asyncio.get_running_loop().run_in_executor(_executor, catalogo.datas)
+
     ui.dark_mode().enable()
     ui.colors(primary='#28a745', secondary='#6c757d', accent='#17a2b8', positive='#21ba45')
 
@@ -165,175 +491,202 @@ def main_page():
         
         ui.label('Visualização').classes('text-h6')
         
-        # Dynamic Date Selector based on CSV files
+        # Dynamic Date Selector based on the historico catalog
         def get_csv_dates():
-            files = sorted(list((ROOT / "historico").glob("matches_*.csv")), reverse=True)
             options = {}
-            for f in files:
-                # filename: matches_DD-MM-YYYY.csv
-                try:
-                    date_part = f.stem.replace("matches_", "")
-                    # Convert to YYYY-MM-DD for internal state consistency
-                    dt = datetime.strptime(date_part, "%d-%m-%Y")
-                    val = dt.strftime("%Y-%m-%d")
-                    label = dt.strftime("%d/%m/%Y")
-                    options[val] = label
-                except: pass
+            for val in dates:
+                # YYYY-MM-DD internally, DD/MM/YYYY on screen
+                dt = datetime.strptime(val, "%Y-%m-%d")
+                options[val] = dt.strftime("%d/%m/%Y")
             return options
 
         ui.select(options=get_csv_dates(), label='Selecionar Data').bind_value(state, 'selected_date')
         
+        # Mercados coletados pelo scraper (config MERCADOS); os padrões valem para qualquer um
+        opcoes_mercados = mercados.colunas(mercados.normalizar(state.config.get("MERCADOS")))
+        ui.select(options=opcoes_mercados, label='Mercado').bind_value(state, 'selected_market')
+
         ui.label('Padrões').classes('q-mt-sm')
         ui.radio(["Resultados", "5x", "4x", "3x", "2x", "1x"]).bind_value(state, 'selected_pattern')
 
     # --- MAIN CONTENT ---
-    with ui.column().classes('w-full q-pa-md'):
-        
-        # Control Buttons
-        with ui.row().classes('w-full q-mb-md'):
-            ui.button('Iniciar Automação', on_click=state.start_process, icon='play_arrow').props('color=positive')
-            ui.button('Parar Automação', on_click=state.stop_process, icon='stop').props('color=negative')
+    with ui.tabs().classes('w-full') as tabs:
+        tab_live = ui.tab('Ao Vivo')
+        tab_backtest = ui.tab('Backtest')
+        tab_logs = ui.tab('Logs')
+
+    with ui.tab_panels(tabs, value=tab_live).classes('w-full'):
+        with ui.tab_panel(tab_live):
+            with ui.column().classes('w-full q-pa-md'):
+                
+                # Control Buttons
+                with ui.row().classes('w-full q-mb-md'):
+                    ui.button('Iniciar Automação', on_click=state.start_process, icon='play_arrow').props('color=positive')
+                    ui.button('Parar Automação', on_click=state.stop_process, icon='stop').props('color=negative')
+
+                # Probabilidades de transição (atualizadas pelo scraper a cada resultado)
+                markov_container = ui.column().classes('w-full')
+
+                # Matrices Container
+                matrices_container = ui.column().classes('w-full')
 
-        # Matrices Container
-        matrices_container = ui.column().classes('w-full')
+                # General Table Container
+                ui.label('Tabela Geral').classes('text-h5 q-mt-lg')
+                table_container = ui.column().classes('w-full')
 
-        # General Table Container
-        ui.label('Tabela Geral').classes('text-h5 q-mt-lg')
-        table_container = ui.column().classes('w-full')
+        with ui.tab_panel(tab_backtest):
+            backtest_panel(dates)
+
+        with ui.tab_panel(tab_logs):
+            logs_panel()
 
     # --- UPDATE LOGIC ---
-    def update_dashboard():
-        # Update Status Label
-        if state.is_process_running():
+    # O processamento roda no pool (processar_dia/montar_markov); aqui só se troca o conteúdo da página.
+    # Última chave (data, versão do dia, mercado, padrão) e último modelo de transição renderizados
+    exibido = {'chave': None, 'markov': None}
+    ocupado = {'tick': False}
+
+    async def update_markov():
+        try:
+            mtime = markov.MODELO_PATH.stat().st_mtime
+        except OSError:
+            mtime = None
+        chave = ('markov', mtime, datetime.now().hour)
+        if chave == exibido['markov']:
+            return
+        html = await compartilhado(chave, montar_markov)
+        exibido['markov'] = chave
+
+        markov_container.clear()
+        with markov_container:
+            ui.label('P(próximo = Sim | últimos k)').classes('text-h5')
+            ui.html(html, sanitize=False).classes('w-full')
+
+    async def update_dashboard():
+        # Update Status Label (state.running é atualizado uma vez por intervalo, fora do loop)
+        if state.running:
             status_label.text = f"Rodando (PID: {state.process_pid})"
             status_label.classes(replace='text-green-3 text-bold')
         else:
             status_label.text = "Parado"
             status_label.classes(replace='text-red-3 text-bold')
 
+        try:
+            await update_markov()
+        except Exception as e:
+            print(f"Error updating markov: {e}")
+
         # Load Data
         try:
-            # Convert YYYY-MM-DD to DD-MM-YYYY for filename
             d = datetime.strptime(state.selected_date, '%Y-%m-%d')
-            date_str = d.strftime('%d-%m-%Y')
-            csv_filename = f"matches_{date_str}.csv"
-            csv_path = ROOT / "historico" / csv_filename
 
-            if not csv_path.exists():
-                matrices_container.clear()
-                table_container.clear()
-                with matrices_container:
-                    ui.label(f"Nenhum dado para {date_str}").classes('text-grey')
+            # Versão publicada do dia (+ mtime/tamanho do arquivo legado): se nada mudou desde a última renderização, não reprocessa
+            chave = ('dia', state.selected_date, particoes.assinatura_dia(d), state.selected_market, state.selected_pattern)
+            if chave == exibido['chave']:
                 return
-
-            # Read CSV with Retry Logic (Handle File Locking)
-            df = None
-            for _ in range(3):
-                try:
-                    df = pd.read_csv(csv_path)
-                    break
-                except Exception:
-                    time.sleep(0.1)
-            
-            if df is None:
-                print(f"⚠️ Could not read CSV {csv_filename} (Locked?)")
-                return # Skip this update cycle
-
-            if df.empty:
+            dados = await compartilhado(chave, processar_dia, state.selected_date, state.selected_market, state.selected_pattern)
+            if dados is None:
                 return
+            exibido['chave'] = chave
 
-            # Basic Cleaning
-            df['Hora'] = pd.to_numeric(df['Hora'], errors='coerce').fillna(0).astype(int)
-            df['Minuto'] = pd.to_numeric(df['Minuto'], errors='coerce').fillna(0).astype(int)
-            
-            # Check required columns
-            if 'Ambos Marcam' not in df.columns:
+            if 'vazio' in dados:
+                matrices_container.clear()
+                table_container.clear()
+                with matrices_container:
+                    ui.label(f"Nenhum dado para {dados['vazio']}").classes('text-grey')
                 return
 
-            # Calculate Patterns (Suppress FutureWarning if any)
-            import warnings
-            with warnings.catch_warnings():
-                warnings.simplefilter("ignore")
-                df = padroes.calcular_padroes(df)
-            
             # --- REBUILD MATRICES ---
             matrices_container.clear()
             with matrices_container:
                 ui.label("Matrizes por Competição").classes('text-h5')
-                
-                competitions = df['Competição'].unique()
-                for comp in competitions:
+                for card in dados['cards']:
                     with ui.card().classes('w-full q-mb-md'):
-                        ui.label(f"🏆 {comp}").classes('text-h6 q-pa-sm')
-                        
-                        df_comp = df[df['Competição'] == comp]
-                        if df_comp.empty: continue
-
-                        col_val = state.selected_pattern
-                        if col_val not in df_comp.columns: col_val = 'Ambos Marcam'
-
-                        # Pivot
-                        matrix = df_comp.pivot_table(index='Hora', columns='Minuto', values=col_val, aggfunc='first')
-                        
-                        # Sort
-                        matrix = matrix.sort_index(ascending=False)
-                        matrix = matrix.sort_index(axis=1, ascending=True)
-
-                        # Custom HTML Table Builder
-                        html = '<table style="width:100%; border-collapse: collapse; text-align: center;">'
-                        
-                        # Header
-                        html += '<thead><tr><th>Hora</th>'
-                        for col in matrix.columns:
-                            html += f'<th style="padding: 4px; border: 1px solid #444;">{col}</th>'
-                        html += '</tr></thead><tbody>'
-                        
-                        # Rows
-                        for idx, row in matrix.iterrows():
-                            html += f'<tr><td style="font-weight:bold; border: 1px solid #444;">{idx}</td>'
-                            for col in matrix.columns:
-                                val = row.get(col, '')
-                                bg_color = '#1d1d1d'
-                                color = '#fff'
-                                if val == 'Sim': 
-                                    bg_color = '#28a745'
-                                    color = '#fff'
-                                elif val == 'Não': 
-                                    bg_color = '#dc3545'
-                                    color = '#fff'
-                                elif pd.isna(val):
-                                    bg_color = '#333'
-                                else:
-                                    bg_color = '#6c757d'
-                                    color = '#fff'
-                                
-                                display_val = val if not pd.isna(val) else ''
-                                html += f'<td style="background-color: {bg_color}; color: {color}; border: 1px solid #444; padding: 4px;">{display_val}</td>'
-                            html += '</tr>'
-                        html += '</tbody></table>'
-                        
-                        ui.html(html, sanitize=False).classes('w-full')
+                        # Lacunas pela cadência da competição (o scraper as recoleta no tempo ocioso)
+                        with ui.row().classes('items-center q-pa-sm'):
+                            ui.label(f"🏆 {card['comp']}").classes('text-h6')
+                            if card['lacunas']:
+                                ui.badge(f"{card['lacunas']} lacunas", color='orange').tooltip(card['horarios'])
+                        if card['html']:
+                            ui.html(card['html'], sanitize=False).classes('w-full')
 
             # --- REBUILD GENERAL TABLE ---
             table_container.clear()
             with table_container:
-                cols_to_show = ['Data', 'Competição', 'Hora', 'Minuto', 'Ambos Marcam']
-                for p in ['5x', '4x', '3x', '2x', '1x']:
-                    if p in df.columns: cols_to_show.append(p)
-                
-                df_sorted = df[cols_to_show].sort_values(by=['Hora', 'Minuto'], ascending=[False, False])
-                
-                # Convert to list of dicts for ui.table
-                rows = df_sorted.to_dict('records')
-                columns = [{'name': c, 'label': c, 'field': c, 'sortable': True} for c in cols_to_show]
-                
-                ui.table(columns=columns, rows=rows, pagination=10).classes('w-full')
+                columns = [{'name': c, 'label': c, 'field': c, 'sortable': True} for c in dados['colunas']]
+                ui.table(columns=columns, rows=dados['linhas'], pagination=10).classes('w-full')
 
         except Exception as e:
+            exibido['chave'] = None  # tenta de novo no próximo tick
             print(f"Error updating: {e}")
             # ui.notify(f"Erro na atualização: {e}", type="negative") # Suppress UI notify for transient errors
 
     # Timer for auto-refresh (every 3 seconds)
-    ui.timer(3.0, update_dashboard)
+    async def timed_update():
+        if ocupado['tick']:
+            return  # o tick anterior ainda espera o processamento
+        ocupado['tick'] = True
+        inicio = time.perf_counter()
+        try:
+            await update_dashboard()
+        finally:
+            ocupado['tick'] = False
+        tick_durations.append(time.perf_counter() - inicio)
+
+    ui.timer(3.0, timed_update)
+
+# Server metrics (used by the load test, carga.py)
+@app.get('/api/metricas')
+def api_metricas(reset: bool = False):
+    ticks = sorted(tick_durations)
+    resumo = {
+        'clientes': len(Client.instances),
+        'ticks': len(ticks),
+        'tick_media_ms': round(1000 * sum(ticks) / len(ticks), 2) if ticks else None,
+        'tick_p95_ms': round(1000 * ticks[int(0.95 * (len(ticks) - 1))], 2) if ticks else None,
+        'tick_max_ms': round(1000 * ticks[-1], 2) if ticks else None,
+    }
+    # Responsividade do event loop: atraso de um sleep de 100 ms (0 = loop livre)
+    lags = sorted(loop_lags)
+    resumo.update({
+        'loop_lag_media_ms': round(1000 * sum(lags) / len(lags), 2) if lags else None,
+        'loop_lag_p95_ms': round(1000 * lags[int(0.95 * (len(lags) - 1))], 2) if lags else None,
+        'loop_lag_max_ms': round(1000 * lags[-1], 2) if lags else None,
+    })
+    if reset:
+        tick_durations.clear()
+        loop_lags.clear()
+    return resumo
+
+# Status do processo do scraper: uma verificação por intervalo para todas as páginas
+STATUS_INTERVALO = 3.0
+
+async def acompanhar_processo():
+    while True:
+        try:
+            await state.check_process()
+        except Exception as e:
+            print(f"Error checking process: {e}")
+        await asyncio.sleep(STATUS_INTERVALO)
+
+app.on_startup(lambda: background_tasks.create(acompanhar_processo()))
+
+# Logs do scraper: uma leitura dos arquivos por intervalo, no pool, para todas as abas
+async def acompanhar_logs():
+    while True:
+        try:
+            await asyncio.get_running_loop().run_in_executor(_executor, seguidor_logs.atualizar)
+        except Exception as e:
+            print(f"Error reading logs: {e}")
+        await asyncio.sleep(LOGS_INTERVALO)
+
+app.on_startup(lambda: background_tasks.create(acompanhar_logs()))
+
+# Mede o atraso do event loop do servidor (só em memória, sem gravar em metricas/)
+app.on_startup(lambda: background_tasks.create(
+    metricas.monitorar_lag(limiar=float('inf'), resumo_a_cada=float('inf'), amostras=loop_lags)))
+
+# API de exportação servida junto com o app NiceGUI
+exportar.registrar(app)
 
-ui.run(title='Bet365 Auto', port=8080, reload=False)
+ui.run(title='Bet365 Auto', port=PORT, reload=False)
@@ -0,0 +1,87 @@
+import re
+
+import numpy as np
+import pandas as pd
+
+# ==========================
+# Esquema tipado das partições do historico/. Os tipos são aplicados na leitura do
+# CSV (dtype do read_csv), então nenhum caminho quente precisa reconverter colunas:
+#   Hora, Minuto           -> int8
+#   Ambos Marcam, 1x..5x   -> categoria fixa RESULTADO ("Sim"/"Não", vazio = NaN)
+#   Data, Competição       -> category
+#   mercados extras        -> category (padrões deles, "<mercado> 1x".., -> RESULTADO)
+# ==========================
+OBRIGATORIAS = ["Data", "Competição", "Hora", "Minuto"]
+INTEIRAS = ("Hora", "Minuto")
+RESULTADO = pd.CategoricalDtype(["Sim", "Não"])
+
+_PADRAO_RE = re.compile(r"^(.+ )?[1-5]x$")
+
+
+def dtype(coluna):
+    if coluna in INTEIRAS:
+        return np.int8
+    if coluna == "Ambos Marcam" or _PADRAO_RE.match(str(coluna)):
+        return RESULTADO
+    return "category"
+
+
+def validar(colunas, origem="DataFrame"):
+    faltando = [c for c in OBRIGATORIAS if c not in colunas]
+    if faltando:
+        raise ValueError(f"{origem}: colunas obrigatórias ausentes {faltando}")
+
+
+def ler_csv(path):
+    """
+    Lê uma partição já com os tipos do esquema. O cabeçalho é validado uma vez, antes
+    do parse; arquivos legados com Hora/Minuto vazios ou inválidos são convertidos por tipar.
+    """
+    cabecalho = pd.read_csv(path, nrows=0).columns
+    if len(cabecalho) == 0:
+        raise pd.errors.EmptyDataError(f"{path}: arquivo vazio")
+    validar(cabecalho, path)
+    try:
+        return pd.read_csv(path, dtype={c: dtype(c) for c in cabecalho})
+    except (ValueError, OverflowError):
+        return tipar(pd.read_csv(path))
+
+
+def tipar(df):
+    """
+    Aplica os tipos do esquema a um DataFrame já carregado (arquivos legados, concat de
+    partições). Colunas já no tipo certo não são tocadas. Altera e retorna o próprio df.
+    """
+    validar(df.columns)
+    for c in df.columns:
+        alvo = dtype(c)
+        atual = df[c].dtype
+        if alvo is np.int8:
+            if atual != np.int8:
+                df[c] = pd.to_numeric(df[c], errors='coerce').fillna(0).astype(np.int8)
+        elif alvo is RESULTADO:
+            if atual != RESULTADO:
+                df[c] = df[c].astype(RESULTADO)
+        elif not isinstance(atual, pd.CategoricalDtype):
+            df[c] = df[c].astype("category")
+    return df
+
+
+def inteiro(serie):
+    """
+    Hora/Minuto como int64 para aritmética de slots, sem reparsear colunas já tipadas.
+    """
+    if pd.api.types.is_integer_dtype(serie.dtype):
+        return serie.astype(np.int64)
+    return pd.to_numeric(serie, errors='coerce').fillna(0).astype(np.int64)
+
+
+def codigos(serie, mapa, padrao):
+    """
+    Array int8 com mapa[valor] para cada linha (padrao para vazios/desconhecidos).
+    Em colunas categóricas consulta só as categorias, não as linhas.
+    """
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        tabela = np.array([mapa.get(c, padrao) for c in serie.cat.categories] + [padrao], np.int8)
+        return tabela[serie.cat.codes.to_numpy()]  # código -1 (NaN) cai no último item
+    return serie.map(mapa).fillna(padrao).to_numpy(np.int8)
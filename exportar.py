@@ -0,0 +1,157 @@
+import hashlib
+import io
+import json
+import warnings
+import zlib
+from datetime import datetime, timedelta
+
+from fastapi import Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+
+import catalogo
+import esquema
+import padroes
+import particoes
+
+# ==========================
+# API de exportação: GET /api/resultados
+#   inicio, fim      -> datas YYYY-MM-DD (fim padrão = inicio)
+#   competicoes      -> lista separada por vírgula (padrão: todas)
+#   hora_inicio/fim  -> janela de horário HH:MM (inclusiva)
+#   formato          -> ndjson | csv | arrow
+#   compressao       -> none | gzip
+# Os dias são lidos e enviados um por vez, então a memória não cresce com o intervalo.
+# Intervalos que terminam antes de hoje (dias fechados) recebem ETag.
+# ==========================
+COLUNAS_EXPORT = ["Data", "Competição", "Hora", "Minuto", "Ambos Marcam"] + padroes.COLUNAS_PADROES
+
+TIPOS_CONTEUDO = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+    "arrow": "application/vnd.apache.arrow.stream",
+}
+
+
+def _minutos(valor, padrao):
+    if not valor:
+        return padrao
+    h, _, m = valor.replace('.', ':').partition(':')
+    return int(h) * 60 + int(m or 0)
+
+
+def _ler_dia(data, competicoes, janela):
+    df = particoes.ler_dia(data)
+    if df is None:
+        return None
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        df = padroes.calcular_padroes(df)
+
+    slots = esquema.inteiro(df['Hora']) * 60 + esquema.inteiro(df['Minuto'])
+    mask = (slots >= janela[0]) & (slots <= janela[1])
+    if competicoes:
+        mask &= df['Competição'].isin(competicoes)
+    df = df[mask].reindex(columns=COLUNAS_EXPORT)
+    df = df.sort_values(by=['Competição', 'Hora', 'Minuto'])
+    for c in ["Ambos Marcam"] + padroes.COLUNAS_PADROES:
+        df[c] = df[c].astype(object).where(df[c].notna(), None)
+    return df
+
+
+def _serializar(dias, formato):
+    """
+    Gera os bytes de cada dia no formato pedido.
+    """
+    if formato == "arrow":
+        import pyarrow as pa
+
+        schema = pa.schema([(c, pa.int16() if c in ("Hora", "Minuto") else pa.string()) for c in COLUNAS_EXPORT])
+        sink = io.BytesIO()
+        with pa.ipc.new_stream(sink, schema) as writer:
+            for df in dias:
+                writer.write_table(pa.Table.from_pandas(df, schema=schema, preserve_index=False))
+                yield sink.getvalue()
+                sink.seek(0)
+                sink.truncate()
+        yield sink.getvalue()
+        return
+
+    primeiro = True
+    for df in dias:
+        if formato == "csv":
+            yield df.to_csv(index=False, header=primeiro).encode("utf-8")
+        else:
+            linhas = (json.dumps(r, ensure_ascii=False) for r in df.to_dict('records'))
+            yield ("\n".join(linhas) + "\n").encode("utf-8")
+        primeiro = False
+
+
+def _gzip(blocos):
+    comp = zlib.compressobj(wbits=31)  # wbits=31 -> container gzip
+    for bloco in blocos:
+        dados = comp.compress(bloco)
+        if dados:
+            yield dados
+    yield comp.flush()
+
+
+def _etag(datas, params, cat):
+    h = hashlib.sha1(json.dumps(params, sort_keys=True).encode())
+    for d in datas:
+        h.update(cat.get(d, {}).get("checksum", "").encode())
+    return f'"{h.hexdigest()}"'
+
+
+def registrar(app):
+    @app.get('/api/resultados')
+    def exportar_resultados(request: Request, inicio: str, fim: str = "", competicoes: str = "",
+                            hora_inicio: str = "", hora_fim: str = "",
+                            formato: str = "ndjson", compressao: str = "none"):
+        try:
+            d_inicio = datetime.strptime(inicio, "%Y-%m-%d")
+            d_fim = datetime.strptime(fim, "%Y-%m-%d") if fim else d_inicio
+            janela = (_minutos(hora_inicio, 0), _minutos(hora_fim, 24 * 60 - 1))
+        except ValueError as e:
+            return JSONResponse({"erro": f"Parâmetro inválido: {e}"}, status_code=400)
+        if formato not in TIPOS_CONTEUDO:
+            return JSONResponse({"erro": f"Formato inválido: {formato}"}, status_code=400)
+        if compressao not in ("none", "gzip"):
+            return JSONResponse({"erro": f"Compressão inválida: {compressao}"}, status_code=400)
+        if formato == "arrow":
+            try:
+                import pyarrow  # noqa: F401
+            except ImportError:
+                return JSONResponse({"erro": "Formato arrow requer o pacote pyarrow."}, status_code=501)
+
+        lista_comps = [c.strip() for c in competicoes.split(",") if c.strip()]
+
+        # Só dias presentes no catálogo (sem varrer o diretório)
+        cat = catalogo.atualizado()
+        datas = []
+        d = d_inicio
+        while d <= d_fim:
+            if d.strftime("%Y-%m-%d") in cat:
+                datas.append(d.strftime("%Y-%m-%d"))
+            d += timedelta(days=1)
+
+        headers = {}
+        if d_fim.date() < datetime.now().date():
+            params = dict(request.query_params)
+            etag = _etag(datas, params, cat)
+            if request.headers.get("if-none-match") == etag:
+                return Response(status_code=304, headers={"ETag": etag})
+            headers["ETag"] = etag
+            headers["Cache-Control"] = "public, max-age=86400"
+
+        def dias():
+            for data in datas:
+                df = _ler_dia(datetime.strptime(data, "%Y-%m-%d"), lista_comps, janela)
+                if df is not None and not df.empty:
+                    yield df
+
+        corpo = _serializar(dias(), formato)
+        if compressao == "gzip":
+            corpo = _gzip(corpo)
+            headers["Content-Encoding"] = "gzip"
+
+        return StreamingResponse(corpo, media_type=TIPOS_CONTEUDO[formato], headers=headers)
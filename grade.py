@@ -0,0 +1,172 @@
+import numpy as np
+import pandas as pd
+
+import esquema
+import padroes
+
+# ==========================
+# Grade de slots: um dia de uma competição como um array int8 indexado pelo minuto
+# do dia (slot = hora * 60 + minuto). Upsert e consulta são O(1), os padrões 1x..5x
+# são deslocamentos do array e a matriz Hora x Minuto é um reshape (sem cópia).
+# Convertida de/para o esquema CSV das partições (Data, Competição, Hora, Minuto, ...).
+# Os demais mercados coletados (ver mercados.py) ficam em arrays object[SLOTS] com o
+# valor vencedor e viram colunas extras da partição, depois dos padrões.
+# ==========================
+SLOTS = 24 * 60
+
+SIM = 1
+NAO = 0
+SEM_RESULTADO = -1  # jogo registrado, resultado ainda não coletado
+SEM_JOGO = -2       # nenhum jogo neste minuto
+
+CODIGOS = {"Sim": SIM, "Não": NAO}
+VALORES = {SIM: "Sim", NAO: "Não"}
+
+COLUNAS_BASE = ["Data", "Competição", "Hora", "Minuto", "Ambos Marcam"]
+
+# Código da grade + 2 -> código da categoria esquema.RESULTADO ("Sim" = 0, "Não" = 1, vazio = -1)
+_PARA_CATEGORIA = np.array([-1, -1, 1, 0], np.int8)
+
+
+def slot(hora, minuto):
+    return int(hora) * 60 + int(minuto)
+
+
+def _slots(df):
+    return (esquema.inteiro(df['Hora']) * 60 + esquema.inteiro(df['Minuto'])).to_numpy()
+
+
+def colunas_mercados(df):
+    """
+    Colunas de mercados extras de uma partição (tudo que não é esquema base nem padrão).
+    """
+    return [c for c in df.columns
+            if c not in COLUNAS_BASE and str(c).split(" ")[-1] not in padroes.DESLOCAMENTOS]
+
+
+def posicionar(df, coluna):
+    """
+    Array object[SLOTS] com os valores brutos de uma coluna (None sem jogo/resultado).
+    """
+    arr = np.full(SLOTS, None, object)
+    if df is None or df.empty or coluna not in df.columns:
+        return arr
+    valores = df[coluna].astype(object)
+    arr[_slots(df)] = valores.where(valores.notna(), None).to_numpy()
+    return arr
+
+
+def codificar(df, coluna="Ambos Marcam"):
+    """
+    Array int8[SLOTS] de uma coluna ('Sim'/'Não') de um DataFrame de uma competição.
+    Em slots duplicados vale a última linha.
+    """
+    arr = np.full(SLOTS, SEM_JOGO, np.int8)
+    if df is None or df.empty:
+        return arr
+    slots = _slots(df)
+    valores = esquema.codigos(df[coluna], CODIGOS, SEM_RESULTADO) if coluna in df.columns \
+        else np.full(len(df), SEM_RESULTADO, np.int8)
+    arr[slots] = valores
+    return arr
+
+
+def matriz(arr):
+    """
+    Visão (24, 60) do array: linha = hora, coluna = minuto. Não copia os dados.
+    """
+    return arr.reshape(24, 60)
+
+
+def deslocar(arr, n):
+    """
+    Padrão "compara com o n-ésimo jogo anterior" calculado sobre os jogos existentes
+    (os slots sem jogo são pulados, como na versão com DataFrame de padroes.calcular_padroes).
+    """
+    saida = np.full(SLOTS, SEM_JOGO, np.int8)
+    jogos = np.flatnonzero(arr != SEM_JOGO)
+    seq = arr[jogos]
+    anterior = np.full(len(seq), SEM_RESULTADO, seq.dtype)
+    if n < len(seq):
+        anterior[n:] = seq[:-n]
+    saida[jogos] = np.where(anterior == SEM_RESULTADO, SEM_RESULTADO, np.where(seq == anterior, SIM, NAO))
+    return saida
+
+
+class GradeDia:
+    """
+    Resultados de uma competição em um dia.
+    """
+    def __init__(self, data, competicao, valores=None, mercados=None):
+        self.data = data
+        self.competicao = competicao
+        self.valores = valores if valores is not None else np.full(SLOTS, SEM_JOGO, np.int8)
+        self.mercados = mercados if mercados is not None else {}
+
+    @classmethod
+    def de_dataframe(cls, df, data, competicao):
+        if df is not None and not df.empty and 'Competição' in df.columns:
+            df = df[df['Competição'] == competicao]
+        mercados = {c: posicionar(df, c) for c in colunas_mercados(df)} if df is not None else {}
+        return cls(data, competicao, codificar(df), mercados)
+
+    @classmethod
+    def ler(cls, csv_path, data, competicao):
+        """
+        Lê uma partição; grade vazia se o arquivo não existir.
+        """
+        df = None
+        try:
+            df = esquema.ler_csv(csv_path)
+        except (FileNotFoundError, pd.errors.EmptyDataError):
+            pass
+        return cls.de_dataframe(df, data, competicao)
+
+    def upsert(self, hora, minuto, resultado, mercados=None):
+        """
+        Registra o jogo (e o resultado, se houver). Um resultado vazio nunca apaga
+        um resultado existente. `mercados` traz os valores dos mercados extras
+        ({coluna: valor}). Retorna o código anterior do slot.
+        """
+        s = slot(hora, minuto)
+        anterior = int(self.valores[s])
+        if resultado in CODIGOS:
+            self.valores[s] = CODIGOS[resultado]
+        elif anterior == SEM_JOGO:
+            self.valores[s] = SEM_RESULTADO
+        for coluna, valor in (mercados or {}).items():
+            if coluna != "Ambos Marcam" and valor:
+                self.mercados.setdefault(coluna, np.full(SLOTS, None, object))[s] = valor
+        return anterior
+
+    def slots_com_resultado(self):
+        return np.flatnonzero(self.valores >= 0)
+
+    def padroes(self):
+        """
+        Padrões 1x..5x de Ambos Marcam, com os nomes de padroes.colunas_padroes.
+        """
+        nomes = padroes.colunas_padroes()
+        return {nomes[c]: deslocar(self.valores, n) for c, n in padroes.DESLOCAMENTOS.items()}
+
+    def para_dataframe(self):
+        """
+        DataFrame no esquema da partição (já com os tipos de esquema.py), ordenado por
+        horário, com os padrões calculados.
+        """
+        def resultado(codigos):
+            return pd.Categorical.from_codes(_PARA_CATEGORIA[codigos + 2], dtype=esquema.RESULTADO)
+
+        jogos = np.flatnonzero(self.valores != SEM_JOGO)
+        df = pd.DataFrame({
+            "Data": pd.Categorical([self.data.strftime('%d/%m/%Y')] * len(jogos)),
+            "Competição": pd.Categorical([self.competicao] * len(jogos)),
+            "Hora": (jogos // 60).astype(np.int8),
+            "Minuto": (jogos % 60).astype(np.int8),
+            "Ambos Marcam": resultado(self.valores[jogos]),
+        })
+        for c, arr in self.padroes().items():
+            df[c] = resultado(arr[jogos])
+        for c, arr in self.mercados.items():
+            df[c] = pd.Categorical(arr[jogos])
+        return df
@@ -0,0 +1,74 @@
+from datetime import datetime
+
+import numpy as np
+
+import grade
+
+# ==========================
+# Lacunas: jogos que deveriam existir pela cadência da competição mas não têm resultado
+# (pulados por "sumiu", timeout de clique ou erro). Uma lacuna desloca os padrões 1x..5x
+# dos jogos seguintes, então os workers as recoletam no tempo ocioso do polling.
+# ==========================
+
+
+def cadencia(arr):
+    """
+    Intervalo (em minutos) mais comum entre jogos consecutivos da grade.
+    """
+    jogos = np.flatnonzero(arr != grade.SEM_JOGO)
+    if len(jogos) < 2:
+        return None
+    diffs = np.diff(jogos)
+    diffs = diffs[diffs > 0]
+    return int(np.bincount(diffs).argmax()) if len(diffs) else None
+
+
+def detectar(arr):
+    """
+    Slots esperados (entre o primeiro e o último resultado) sem resultado coletado.
+    A cadência é alinhada ao primeiro resultado do dia.
+    """
+    coletados = np.flatnonzero(arr >= 0)
+    passo = cadencia(arr)
+    if len(coletados) < 2 or not passo:
+        return np.array([], np.int64)
+    esperados = np.arange(coletados[0], coletados[-1] + 1, passo)
+    return esperados[arr[esperados] < 0]
+
+
+class FilaRecoleta:
+    """
+    Fila de jogos a recoletar de uma competição, chave (DD/MM/YYYY, hora, minuto).
+    Prioridade: menos tentativas primeiro e, entre elas, o jogo mais recente (ainda
+    visível na lista e que afeta os padrões mais novos). Após `max_tentativas` o jogo é
+    abandonado e não volta para a fila.
+    """
+    def __init__(self, max_tentativas=3):
+        self.max_tentativas = max_tentativas
+        self.tentativas = {}
+        self.abandonados = set()
+
+    def __len__(self):
+        return len(self.tentativas)
+
+    def adicionar(self, date_str, hora, minuto):
+        chave = (date_str, int(hora), int(minuto))
+        if chave not in self.abandonados:
+            self.tentativas.setdefault(chave, 0)
+
+    def pendentes(self):
+        def prioridade(chave):
+            data = datetime.strptime(chave[0], '%d/%m/%Y')
+            return (self.tentativas[chave], -data.toordinal(), -grade.slot(chave[1], chave[2]))
+        return sorted(self.tentativas, key=prioridade)
+
+    def concluir(self, chave):
+        self.tentativas.pop(chave, None)
+
+    def falhou(self, chave):
+        if chave not in self.tentativas:
+            return
+        self.tentativas[chave] += 1
+        if self.tentativas[chave] >= self.max_tentativas:
+            del self.tentativas[chave]
+            self.abandonados.add(chave)
@@ -0,0 +1,251 @@
+import atexit
+import copy
+import json
+import threading
+
+import esquema
+import particoes
+
+# ==========================
+# Modelo de transição (cadeia de Markov de ordem k) da coluna 'Ambos Marcam'.
+# Para cada competição guarda contagens [Sim, Não] do próximo resultado dado o contexto
+# dos últimos k resultados (k = 0..K_MAX), no total ("*") e por hora do jogo.
+# Contextos são strings de 'S'/'N', do mais antigo para o mais recente ("" = sem contexto).
+# O escritor atualiza as contagens a cada resultado salvo (custo O(K_MAX)) numa cópia em
+# memória e regrava historico/markov.json a cada SALVAR_A_CADA resultados ou no máximo
+# SALVAR_INTERVALO segundos depois da primeira alteração pendente. O dashboard só lê o
+# arquivo, sem reler o histórico.
+# ==========================
+K_MAX = 5
+TODAS_HORAS = "*"
+CODIGOS = {"Sim": "S", "Não": "N"}
+
+SALVAR_A_CADA = 20
+SALVAR_INTERVALO = 30.0
+
+MODELO_PATH = particoes.HISTORY_DIR / "markov.json"
+
+_lock = threading.RLock()
+_cache = None  # (mtime, modelo) do arquivo; nunca alterado depois de lido/gravado
+
+# Alterações ainda não gravadas: cópia do modelo salvo com os resultados novos aplicados
+_pendente = None  # (mtime do arquivo de origem, modelo)
+_n_pendentes = 0
+_timer = None
+
+
+def _vazio():
+    return {"k_max": K_MAX, "contagens": {}, "ultimos": {}}
+
+
+def _salvar(modelo):
+    global _cache
+    def escrever(tmp):
+        with open(tmp, "w", encoding="utf-8") as fp:
+            json.dump(modelo, fp, ensure_ascii=False, separators=(",", ":"))
+    particoes.publicar(MODELO_PATH, escrever)
+    _cache = (MODELO_PATH.stat().st_mtime, modelo)
+
+
+def _ler():
+    """
+    Modelo salvo (relido só quando o arquivo muda) ou None se não existir/estiver ilegível.
+    """
+    global _cache
+    try:
+        mtime = MODELO_PATH.stat().st_mtime
+    except FileNotFoundError:
+        return None
+    if _cache and _cache[0] == mtime:
+        return _cache[1]
+    try:
+        with open(MODELO_PATH, "r", encoding="utf-8") as fp:
+            modelo = json.load(fp)
+    except Exception as e:
+        print(f"⚠️ Modelo de transição ilegível ({e}). Reconstruindo...")
+        return None
+    _cache = (mtime, modelo)
+    return modelo
+
+
+def carregar():
+    """
+    Retorna o modelo salvo. Reconstrói se ainda não existir.
+    """
+    modelo = _ler()
+    return modelo if modelo is not None else reconstruir()
+
+
+def contar(modelo, comp, hora, contexto, resultado, sinal=1):
+    """
+    Soma `sinal` à transição contexto -> resultado para todas as ordens 0..K_MAX
+    (no total e na hora do jogo).
+    """
+    indice = 0 if resultado == "Sim" else 1
+    tabelas = modelo["contagens"].setdefault(comp, {})
+    for chave_hora in (TODAS_HORAS, str(hora)):
+        tabela = tabelas.setdefault(chave_hora, {})
+        for k in range(min(len(contexto), modelo["k_max"]) + 1):
+            ctx = contexto[len(contexto) - k:]
+            celula = tabela.setdefault(ctx, [0, 0])
+            celula[indice] += sinal
+
+
+def contexto_anterior(df, comp, hora, minuto, k_max=K_MAX):
+    """
+    Últimos k_max resultados da competição antes de hora:minuto ('S'/'N', mais antigo primeiro).
+    O contexto é cortado no último jogo sem resultado.
+    """
+    df_comp = df[df['Competição'] == comp]
+    slots = esquema.inteiro(df_comp['Hora']) * 60 \
+        + esquema.inteiro(df_comp['Minuto'])
+    anteriores = df_comp.loc[slots[slots < int(hora) * 60 + int(minuto)].sort_values().index, 'Ambos Marcam']
+    contexto = ""
+    for valor in reversed(anteriores.tolist()[-k_max:]):
+        if valor not in CODIGOS:
+            break
+        contexto = CODIGOS[valor] + contexto
+    return contexto
+
+
+def _posicao(date, hora, minuto):
+    return [date.strftime("%Y-%m-%d"), int(hora), int(minuto)]
+
+
+def _mtime():
+    try:
+        return MODELO_PATH.stat().st_mtime
+    except FileNotFoundError:
+        return None
+
+
+def _agendar():
+    global _timer
+    if _timer is None:
+        _timer = threading.Timer(SALVAR_INTERVALO, descarregar)
+        _timer.daemon = True
+        _timer.start()
+
+
+def _cancelar_timer():
+    global _timer
+    if _timer is not None:
+        _timer.cancel()
+        _timer = None
+
+
+def descarregar():
+    """
+    Grava as contagens pendentes em markov.json. Se a gravação falhar, as alterações
+    continuam pendentes (o modelo em cache não foi tocado) e são tentadas de novo.
+    Se o arquivo foi reconstruído por fora (`python markov.py`) desde a cópia, as
+    pendências são descartadas: a reconstrução já conta os resultados salvos no histórico.
+    """
+    global _pendente, _n_pendentes
+    with _lock:
+        _cancelar_timer()
+        if _pendente is None:
+            return
+        origem, modelo = _pendente
+        if _mtime() != origem:
+            print("⚠️ markov.json mudou desde a última leitura. Descartando contagens pendentes.")
+            _pendente, _n_pendentes = None, 0
+            return
+        try:
+            _salvar(modelo)
+        except Exception as e:
+            print(f"⚠️ Erro ao gravar o modelo de transição ({e}). Nova tentativa em {SALVAR_INTERVALO:.0f}s.")
+            _agendar()
+            return
+        _pendente, _n_pendentes = None, 0
+
+
+atexit.register(descarregar)
+
+
+def registrar_resultado(date, comp, hora, minuto, anterior, novo, df):
+    """
+    Chamado pelo escritor após salvar um resultado. `anterior` é o valor que o jogo tinha
+    antes (None se novo) e `df` a partição (date, comp) já atualizada.
+    A alteração fica pendente em memória até a próxima gravação (ver descarregar).
+    Resultados que chegam fora de ordem não corrigem o contexto dos jogos seguintes;
+    `python markov.py` reconstrói o modelo a partir do histórico.
+    """
+    global _pendente, _n_pendentes
+    if novo not in CODIGOS or anterior == novo:
+        return
+    contexto = contexto_anterior(df, comp, hora, minuto)
+    with _lock:
+        if _pendente is not None and _mtime() != _pendente[0]:
+            descarregar()  # reconstruído por fora: descarta as pendências e parte do arquivo novo
+        if _pendente is None:
+            salvo = _ler()
+            if salvo is None:
+                reconstruir()  # a partição já contém o resultado novo
+                return
+            _pendente = (_mtime(), copy.deepcopy(salvo))
+        modelo = _pendente[1]
+        if anterior in CODIGOS:
+            contar(modelo, comp, hora, contexto, anterior, -1)
+        contar(modelo, comp, hora, contexto, novo)
+        posicao = _posicao(date, hora, minuto)
+        if posicao >= modelo["ultimos"].get(comp, {}).get("posicao", []):
+            modelo["ultimos"][comp] = {
+                "posicao": posicao,
+                "contexto": (contexto + CODIGOS[novo])[-modelo["k_max"]:],
+            }
+        _n_pendentes += 1
+        if _n_pendentes >= SALVAR_A_CADA:
+            descarregar()
+        else:
+            _agendar()
+
+
+def probabilidade(modelo, comp, contexto, k, hora=None):
+    """
+    Retorna (sim, total) para P(próximo = Sim | últimos k resultados = contexto[-k:]).
+    hora=None usa as contagens do dia inteiro. Se o contexto tiver menos de k resultados, total = 0.
+    """
+    if k > len(contexto):
+        return 0, 0
+    tabela = modelo["contagens"].get(comp, {}).get(TODAS_HORAS if hora is None else str(hora), {})
+    sim, nao = tabela.get(contexto[len(contexto) - k:], (0, 0))
+    return sim, sim + nao
+
+
+def reconstruir():
+    """
+    Recalcula o modelo a partir de todos os dias do histórico.
+    """
+    modelo = _vazio()
+    for date in sorted(particoes.list_days()):
+        try:
+            df = particoes.ler_dia(date)
+        except Exception as e:
+            print(f"⚠️ Erro ao ler {date.strftime('%d-%m-%Y')}: {e}")
+            continue
+        if df is None or 'Ambos Marcam' not in df.columns:
+            continue
+        horas = esquema.inteiro(df['Hora'])
+        minutos = esquema.inteiro(df['Minuto'])
+        df = df.assign(_slot=horas * 60 + minutos).sort_values('_slot')
+        for comp, grupo in df.groupby('Competição', sort=False, observed=True):
+            contexto = ""
+            for slot, valor in zip(grupo['_slot'], grupo['Ambos Marcam']):
+                if valor not in CODIGOS:
+                    contexto = ""
+                    continue
+                contar(modelo, comp, slot // 60, contexto, valor)
+                contexto = (contexto + CODIGOS[valor])[-K_MAX:]
+                modelo["ultimos"][comp] = {"posicao": _posicao(date, slot // 60, slot % 60), "contexto": contexto}
+    global _pendente, _n_pendentes
+    with _lock:
+        _cancelar_timer()
+        _pendente, _n_pendentes = None, 0  # o histórico já contém os resultados pendentes
+        _salvar(modelo)
+    return modelo
+
+
+if __name__ == "__main__":
+    modelo = reconstruir()
+    print(f"✅ Modelo de transição reconstruído: {len(modelo['contagens'])} competições em {MODELO_PATH}")
@@ -0,0 +1,107 @@
+import asyncio
+
+# ==========================
+# Mercados coletados em cada visita ao painel de resultado de um jogo.
+# Cada mercado tem a coluna gravada no historico/ e o título do botão no painel
+# (".market-search__link-wrapper > div > button"). Todos os mercados configurados
+# são abertos e lidos com o mesmo número de chamadas ao browser (abrir, esperar, ler),
+# então o custo por visita não cresce com o número de mercados.
+# O valor gravado é o nome da seleção vencedora ("Won"); mais de uma é unida por " / ".
+# Exemplo no config.json:
+#   "MERCADOS": ["Ambos Marcam",
+#                {"coluna": "Resultado Correto", "titulo": "Resultado Correto"},
+#                {"coluna": "Gols +/-", "titulo": "Total de Gols"}]
+# ==========================
+PRINCIPAL = "Ambos Marcam"
+PADRAO = [{"coluna": PRINCIPAL, "titulo": PRINCIPAL}]
+SEPARADOR = " / "
+
+# Abre (clica) os mercados pedidos que ainda estão fechados; retorna os títulos encontrados
+_JS_ABRIR = """(titulos) => {
+    const encontrados = [];
+    for (const item of document.querySelectorAll('.market-search__link-wrapper > div')) {
+        const btn = item.querySelector('button');
+        if (!btn) continue;
+        const titulo = btn.innerText.split('\\n')[0].trim();
+        if (!titulos.includes(titulo)) continue;
+        if (!item.querySelector('.market-search__link-variables')) btn.click();
+        encontrados.push(titulo);
+    }
+    return encontrados;
+}"""
+
+# Verdadeiro quando todos os mercados abertos já mostram suas seleções
+_JS_PRONTO = """(titulos) => {
+    for (const item of document.querySelectorAll('.market-search__link-wrapper > div')) {
+        const btn = item.querySelector('button');
+        if (!btn || !titulos.includes(btn.innerText.split('\\n')[0].trim())) continue;
+        if (!item.querySelector('.market-search__link-variables-row')) return false;
+    }
+    return true;
+}"""
+
+# {título: [seleções vencedoras]}
+_JS_LER = """(titulos) => {
+    const resultado = {};
+    for (const item of document.querySelectorAll('.market-search__link-wrapper > div')) {
+        const btn = item.querySelector('button');
+        if (!btn) continue;
+        const titulo = btn.innerText.split('\\n')[0].trim();
+        if (!titulos.includes(titulo)) continue;
+        const vencedores = [];
+        for (const row of item.querySelectorAll('.market-search__link-variables-row')) {
+            const nome = row.querySelector('.market-search__link-variables-name');
+            const valor = row.querySelector('.market-search__link-variables-value');
+            if (nome && valor && valor.innerText.trim() === 'Won') vencedores.push(nome.innerText.trim());
+        }
+        resultado[titulo] = vencedores;
+    }
+    return resultado;
+}"""
+
+
+def normalizar(mercados):
+    """
+    Converte a configuração (nomes ou dicts) em [{"coluna", "titulo"}], com
+    Ambos Marcam sempre presente e em primeiro lugar.
+    """
+    definicoes = []
+    for m in mercados or []:
+        d = {"coluna": m, "titulo": m} if isinstance(m, str) else {"coluna": m["coluna"], "titulo": m.get("titulo", m["coluna"])}
+        if d["coluna"] not in [x["coluna"] for x in definicoes]:
+            definicoes.append(d)
+    if PRINCIPAL not in [d["coluna"] for d in definicoes]:
+        definicoes.insert(0, dict(PADRAO[0]))
+    return sorted(definicoes, key=lambda d: d["coluna"] != PRINCIPAL)
+
+
+def colunas(mercados):
+    return [d["coluna"] for d in mercados]
+
+
+async def extrair(page, mercados, timeout=3):
+    """
+    Lê todos os mercados do painel aberto numa única passada. Retorna ({coluna: valor},
+    colunas encontradas no painel); os valores só trazem mercados com seleção vencedora.
+    """
+    titulos = [d["titulo"] for d in mercados]
+    try:
+        encontrados = await page.evaluate(_JS_ABRIR, titulos)
+        if not encontrados:
+            return {}, []
+        try:
+            await page.wait_for_function(_JS_PRONTO, arg=encontrados, timeout=timeout * 1000)
+        except Exception:
+            await asyncio.sleep(0.2)  # lê o que já estiver aberto
+        lidos = await page.evaluate(_JS_LER, titulos)
+    except Exception:
+        return {}, []
+
+    valores = {}
+    for d in mercados:
+        vencedores = lidos.get(d["titulo"]) or []
+        if vencedores:
+            valores[d["coluna"]] = SEPARADOR.join(vencedores)
+    if valores.get(PRINCIPAL) not in (None, "Sim", "Não"):
+        del valores[PRINCIPAL]
+    return valores, [d["coluna"] for d in mercados if d["titulo"] in encontrados]
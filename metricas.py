@@ -0,0 +1,76 @@
+import asyncio
+import json
+import queue
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent
+METRICAS_DIR = ROOT / "metricas"
+
+# Gravação em disco feita por uma thread própria para não bloquear o event loop
+_lock = threading.Lock()
+_fila_gravacao = queue.Queue()
+_gravador = None
+
+
+def get_metricas_filename():
+    return METRICAS_DIR / f"metricas_{datetime.now().strftime('%Y-%m-%d')}.jsonl"
+
+
+def registrar_evento(nome, duracao=None, **dados):
+    """
+    Registra um evento (ex: recuperação de navegação) no arquivo
+    metricas/metricas_YYYY-MM-DD.jsonl (uma linha JSON por evento).
+    """
+    evento = {"ts": datetime.now().isoformat(timespec='seconds'), "evento": nome}
+    if duracao is not None:
+        evento["duracao"] = round(duracao, 3)
+    evento.update(dados)
+
+    global _gravador
+    with _lock:
+        if _gravador is None:
+            _gravador = threading.Thread(target=_gravar_eventos, name="metricas", daemon=True)
+            _gravador.start()
+    _fila_gravacao.put(evento)
+    return evento
+
+
+def _gravar_eventos():
+    while True:
+        evento = _fila_gravacao.get()
+        try:
+            METRICAS_DIR.mkdir(exist_ok=True)
+            with open(get_metricas_filename(), "a", encoding="utf-8") as fp:
+                fp.write(json.dumps(evento, ensure_ascii=False) + "\n")
+        except Exception as e:
+            print(f"⚠️ Erro ao gravar métrica: {e}")
+
+
+async def monitorar_lag(intervalo=0.1, limiar=0.25, resumo_a_cada=60, amostras=None):
+    """
+    Mede o atraso do event loop: dorme `intervalo` segundos e compara com o tempo real.
+    Atrasos acima de `limiar` são registrados como "lag_event_loop"; a cada `resumo_a_cada`
+    segundos registra "lag_resumo" com o maior atraso e o número de travamentos da janela.
+    Se `amostras` (deque) for informado, cada atraso medido também é guardado nele.
+    """
+    maior = 0.0
+    travamentos = 0
+    inicio_janela = time.monotonic()
+    while True:
+        antes = time.monotonic()
+        await asyncio.sleep(intervalo)
+        atraso = time.monotonic() - antes - intervalo
+        if amostras is not None:
+            amostras.append(atraso)
+        maior = max(maior, atraso)
+        if atraso > limiar:
+            travamentos += 1
+            registrar_evento("lag_event_loop", duracao=atraso)
+        if time.monotonic() - inicio_janela >= resumo_a_cada:
+            registrar_evento("lag_resumo", duracao=maior, travamentos=travamentos)
+            maior = 0.0
+            travamentos = 0
+            inicio_janela = time.monotonic()
@@ -1,11 +1,29 @@
+import numpy as np
 import pandas as pd
-from pathlib import Path
 from datetime import datetime
-import time
 
-def calcular_padroes(df):
+import esquema
+import particoes
+
+# Versão da lógica de padrões (registrada no catálogo para saber quais arquivos estão atualizados)
+VERSAO_PADROES = 1
+COLUNAS_PADROES = ['5x', '4x', '3x', '2x', '1x']
+# Cada padrão compara o resultado com o N-ésimo registro anterior
+DESLOCAMENTOS = {'1x': 2, '2x': 3, '3x': 4, '4x': 5, '5x': 6}
+
+def colunas_padroes(coluna='Ambos Marcam'):
+    """
+    Nomes das colunas de padrões de um mercado: '1x'..'5x' para Ambos Marcam
+    (esquema original das partições) e '<mercado> 1x'.. para os demais.
+    """
+    if coluna == 'Ambos Marcam':
+        return {p: p for p in DESLOCAMENTOS}
+    return {p: f"{coluna} {p}" for p in DESLOCAMENTOS}
+
+def calcular_padroes(df, coluna='Ambos Marcam'):
     """
-    Calcula as colunas de padrões 5x, 4x, 3x, 2x, 1x baseadas na coluna 'Ambos Marcam'.
+    Calcula as colunas de padrões 5x, 4x, 3x, 2x, 1x baseadas na coluna do mercado
+    (por padrão 'Ambos Marcam'; outros mercados geram '<mercado> 1x'.. '<mercado> 5x').
     Lógica:
     5x: Compara com 6º anterior
     4x: Compara com 5º anterior
@@ -16,115 +34,63 @@ def calcular_padroes(df):
     if df.empty:
         return df
 
-    # Garante que está ordenado por Competição e Horário
-    # Convertendo Hora e Minuto para garantir ordenação correta
-    df['Hora_Num'] = pd.to_numeric(df['Hora'], errors='coerce').fillna(0)
-    df['Minuto_Num'] = pd.to_numeric(df['Minuto'], errors='coerce').fillna(0)
-    
-    df = df.sort_values(by=['Competição', 'Hora_Num', 'Minuto_Num'])
+    # Tipos do esquema (Hora/Minuto int8, resultados categóricos); não reconverte um
+    # DataFrame lido por esquema.ler_csv. Garante a ordenação por Competição e Horário.
+    df = esquema.tipar(df)
+    df = df.sort_values(by=['Competição', 'Hora', 'Minuto'])
+    nomes = colunas_padroes(coluna)
     
     # Função interna para aplicar em cada grupo (Competição)
     def processar_grupo(group):
-        # Garante que o índice está resetado para os shifts funcionarem sequencialmente no grupo
-        # Mas o shift do pandas opera na Series, então a ordem das linhas no grupo importa.
-        
-        am = group['Ambos Marcam']
+        # A ordem das linhas no grupo importa: o shift do pandas opera na Series ordenada por horário.
+        valores = group[coluna] if coluna in group.columns else pd.Series(None, index=group.index, dtype=object)
         
-        # 1x: 2º registro anterior (shift 2)
-        p1x = (am == am.shift(2))
-        group['1x'] = p1x.map({True: 'Sim', False: 'Não'})
-        group.loc[am.shift(2).isna(), '1x'] = None # Se não tem anterior, fica vazio
-        
-        # 2x: 3º registro anterior (shift 3)
-        p2x = (am == am.shift(3))
-        group['2x'] = p2x.map({True: 'Sim', False: 'Não'})
-        group.loc[am.shift(3).isna(), '2x'] = None
-
-        # 3x: 4º registro anterior (shift 4)
-        p3x = (am == am.shift(4))
-        group['3x'] = p3x.map({True: 'Sim', False: 'Não'})
-        group.loc[am.shift(4).isna(), '3x'] = None
-
-        # 4x: 5º registro anterior (shift 5)
-        p4x = (am == am.shift(5))
-        group['4x'] = p4x.map({True: 'Sim', False: 'Não'})
-        group.loc[am.shift(5).isna(), '4x'] = None
-
-        # 5x: 6º registro anterior (shift 6)
-        p5x = (am == am.shift(6))
-        group['5x'] = p5x.map({True: 'Sim', False: 'Não'})
-        group.loc[am.shift(6).isna(), '5x'] = None
+        # Nx: compara com o registro `deslocamento` posições antes
+        for padrao, deslocamento in DESLOCAMENTOS.items():
+            anterior = valores.shift(deslocamento)
+            resultado = np.where(valores == anterior, 'Sim', 'Não').astype(object)
+            resultado[anterior.isna().to_numpy()] = None # Se não tem anterior, fica vazio
+            group[nomes[padrao]] = pd.Categorical(resultado, dtype=esquema.RESULTADO)
         
         return group
 
-    # Aplica a função agrupando por competição
-    # group_keys=False para manter o índice original ou evitar multi-index desnecessário
-    df_processado = df.groupby('Competição', group_keys=False).apply(processar_grupo, include_groups=False)
-    
-    # Se 'Competição' sumiu (por causa do include_groups=False), precisamos restaurá-la ou garantir que ela não seja necessária no retorno se o índice for preservado.
-    # O apply com include_groups=False remove a coluna de agrupamento do df passado para a função.
-    # Mas como estamos retornando o grupo modificado, e o índice original é preservado, a coluna Competição deve estar no df original.
-    # Porém, o resultado do apply pode não ter a coluna Competição se ela foi excluída.
-    # Vamos ajustar a estratégia:
-    # Melhor: Iterar pelos grupos manualmente para evitar warnings e complexidade do apply novo.
-    
-    dfs = []
-    for name, group in df.groupby('Competição'):
-        dfs.append(processar_grupo(group.copy()))
-    
-    if dfs:
-        df_processado = pd.concat(dfs)
-    else:
-        df_processado = df
-    
-    # Remove colunas auxiliares
-    if 'Hora_Num' in df_processado.columns:
-        df_processado = df_processado.drop(columns=['Hora_Num', 'Minuto_Num'])
+    # Itera pelos grupos (competições presentes) em vez de groupby().apply
+    dfs = [processar_grupo(group.copy()) for _, group in df.groupby('Competição', observed=True)]
     
-    return df_processado
+    return pd.concat(dfs) if dfs else df
 
 def atualizar_arquivo_hoje():
     """
-    Lê o CSV de hoje, calcula os padrões e salva novamente.
+    Lê os arquivos de hoje (uma partição por competição), calcula os padrões e salva novamente.
     """
-    ROOT = Path(__file__).resolve().parent
-    date_str = datetime.now().strftime('%d-%m-%Y')
-    csv_filename = f"matches_{date_str}.csv"
-    csv_path = ROOT / "historico" / csv_filename
+    hoje = datetime.now()
+    arquivos = particoes.day_files(hoje)
     
-    if not csv_path.exists():
-        print(f"⚠️ Arquivo {csv_filename} não encontrado para atualização de padrões.")
+    if not arquivos:
+        print(f"⚠️ Nenhum arquivo de {hoje.strftime('%d-%m-%Y')} encontrado para atualização de padrões.")
         return
 
-    try:
-        # Tenta ler o arquivo (pode ter conflito de leitura/escrita se o app2 estiver usando, então tentamos com retries simples)
-        for attempt in range(3):
-            try:
-                df = pd.read_csv(csv_path)
-                break
-            except PermissionError:
-                time.sleep(1)
-        else:
-            print("❌ Erro de permissão ao ler arquivo CSV (está aberto?).")
-            return
+    for csv_path in arquivos:
+        atualizar_arquivo(csv_path)
 
+    import catalogo
+    catalogo.atualizar_dia(hoje)
+    particoes.incrementar_versao(hoje)
+
+def atualizar_arquivo(csv_path):
+    csv_filename = csv_path.name
+    try:
+        # Partições são publicadas por troca atômica; o arquivo legado é lido com novas tentativas
+        df = particoes.ler_arquivo(csv_path)
         if df.empty:
             return
 
         # Calcula padrões
         df_atualizado = calcular_padroes(df)
         
-        # Salva
-        # Usa mode='w' para sobrescrever com as novas colunas
-        for attempt in range(3):
-            try:
-                df_atualizado.to_csv(csv_path, index=False)
-                print(f"✅ Padrões atualizados em {csv_filename}")
-                break
-            except PermissionError:
-                time.sleep(1)
-        else:
-            print("❌ Erro de permissão ao salvar arquivo CSV.")
+        # Publica a versão nova do arquivo (temporário + troca atômica)
+        particoes.salvar_csv(df_atualizado, csv_path)
+        print(f"✅ Padrões atualizados em {csv_filename}")
 
     except Exception as e:
         print(f"❌ Erro ao atualizar padrões: {e}")
@@ -0,0 +1,193 @@
+import os
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+
+import esquema
+
+# ==========================
+# Layout particionado de historico/:
+#   historico/DD-MM-YYYY/<Competição>.csv   (uma partição por data e competição)
+#   historico/DD-MM-YYYY/VERSAO              (contador incrementado a cada publicação do dia)
+# Arquivos antigos historico/matches_DD-MM-YYYY.csv continuam sendo lidos pela visão
+# mesclada (ler_dia), então o histórico anterior não precisa ser migrado.
+# Toda escrita é publicada por troca atômica (temporário + os.replace): leitores veem o
+# arquivo antigo ou o novo inteiro, nunca um arquivo pela metade, e só releem o dia
+# quando VERSAO muda.
+# O arquivo legado ainda é escrito por outros escritores (scraper.js), que o reescrevem
+# no lugar e não incrementam VERSAO: para ele a mudança é detectada por mtime/tamanho
+# (assinatura_dia) e a leitura é repetida se pegar o arquivo no meio da escrita.
+# ==========================
+ROOT = Path(__file__).resolve().parent
+# BET_HISTORY_DIR permite apontar para outro diretório (ex: dados sintéticos do teste de carga)
+HISTORY_DIR = Path(os.environ.get("BET_HISTORY_DIR") or ROOT / "historico")
+HISTORY_DIR.mkdir(exist_ok=True)
+
+FORMATO_DIA = "%d-%m-%Y"
+
+# Tentativas de leitura de um arquivo que não é publicado atomicamente (legado)
+TENTATIVAS_LEITURA = 3
+
+# Depois da meia-noite os workers seguem drenando a lista do dia anterior (resultados de
+# 23:5x saem após 00:00) por no máximo TOLERANCIA_MINUTOS antes de abrir a lista do dia.
+TOLERANCIA_MINUTOS = 60
+
+
+def slug(comp_name):
+    return comp_name.replace(" ", "_")
+
+
+def get_day_dir(date):
+    return HISTORY_DIR / date.strftime(FORMATO_DIA)
+
+
+def get_partition_path(date, comp_name):
+    return get_day_dir(date) / f"{slug(comp_name)}.csv"
+
+
+def get_version_path(date):
+    return get_day_dir(date) / "VERSAO"
+
+
+def get_legacy_path(date):
+    return HISTORY_DIR / f"matches_{date.strftime(FORMATO_DIA)}.csv"
+
+
+def partitions_of_day(date):
+    day_dir = get_day_dir(date)
+    return sorted(day_dir.glob("*.csv")) if day_dir.is_dir() else []
+
+
+def day_files(date):
+    """
+    Arquivos de um dia: arquivo legado (se existir) seguido das partições.
+    """
+    legacy = get_legacy_path(date)
+    return ([legacy] if legacy.exists() else []) + partitions_of_day(date)
+
+
+def list_days():
+    """
+    Todas as datas com dados (partições ou arquivo legado), sem ordem definida.
+    """
+    dias = set()
+    for p in HISTORY_DIR.iterdir():
+        if p.is_dir():
+            nome = p.name
+        elif p.name.startswith("matches_") and p.suffix == ".csv":
+            nome = p.stem.replace("matches_", "")
+        else:
+            continue
+        try:
+            dias.add(datetime.strptime(nome, FORMATO_DIA))
+        except ValueError:
+            pass
+    return dias
+
+
+def publicar(path, escrever):
+    """
+    Publica `path` atomicamente: `escrever(tmp)` grava um temporário no mesmo diretório,
+    que então substitui o arquivo com os.replace.
+    """
+    path = Path(path)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    escrever(tmp)
+    for _ in range(20):
+        try:
+            os.replace(tmp, path)
+            return
+        except PermissionError:
+            # Windows: o destino não pode ser trocado enquanto um leitor o mantém aberto
+            time.sleep(0.05)
+    os.replace(tmp, path)
+
+
+def salvar_csv(df, path):
+    publicar(path, lambda tmp: df.to_csv(tmp, index=False, encoding='utf-8-sig'))
+
+
+_versao_lock = threading.Lock()
+
+
+def versao_dia(date):
+    """
+    Versão publicada do dia (0 se nunca publicado). Leitura barata para saber se o dia mudou.
+    """
+    try:
+        return int(get_version_path(date).read_text())
+    except (FileNotFoundError, ValueError):
+        return 0
+
+
+def _stat(path):
+    try:
+        st = path.stat()
+        return (path.name, st.st_mtime_ns, st.st_size)
+    except OSError:
+        return (path.name, None, None)
+
+
+def assinatura_dia(date):
+    """
+    Chave barata que muda sempre que os dados do dia mudam: a VERSAO publicada mais
+    mtime/tamanho dos arquivos que não passam por ela (o legado sempre; as partições
+    também enquanto o dia não tiver VERSAO, ex: escritas antes do contador existir).
+    """
+    versao = versao_dia(date)
+    legado = get_legacy_path(date)
+    arquivos = ([legado] if legado.exists() else []) if versao else day_files(date)
+    return (versao, tuple(_stat(f) for f in arquivos))
+
+
+def incrementar_versao(date):
+    """
+    Chamado pelo escritor depois de publicar todos os arquivos de uma atualização do dia.
+    """
+    with _versao_lock:
+        versao = versao_dia(date) + 1
+        get_day_dir(date).mkdir(exist_ok=True)
+        publicar(get_version_path(date), lambda tmp: tmp.write_text(str(versao)))
+        return versao
+
+
+def ler_arquivo(path):
+    """
+    Lê uma partição pelo esquema. O arquivo legado é reescrito no lugar por outros
+    escritores, então a leitura dele é repetida algumas vezes antes de desistir.
+    """
+    path = Path(path)
+    if not path.name.startswith("matches_"):
+        return esquema.ler_csv(path)
+    for tentativa in range(TENTATIVAS_LEITURA):
+        try:
+            return esquema.ler_csv(path)
+        except Exception:
+            if tentativa == TENTATIVAS_LEITURA - 1:
+                raise
+            time.sleep(0.1)
+
+
+def ler_dia(date):
+    """
+    Visão mesclada de um dia (todas as competições). Retorna None se não houver dados.
+    Em caso de duplicidade entre o arquivo legado e uma partição, vale a partição.
+    """
+    dfs = []
+    for f in day_files(date):
+        try:
+            df = ler_arquivo(f)
+        except pd.errors.EmptyDataError:
+            continue
+        if not df.empty:
+            dfs.append(df)
+    if not dfs:
+        return None
+    if len(dfs) == 1:
+        return dfs[0]
+    # Categorias diferentes por arquivo viram object no concat: reaplica os tipos
+    df = esquema.tipar(pd.concat(dfs, ignore_index=True))
+    return df[~df.duplicated(subset=['Competição', 'Hora', 'Minuto'], keep='last')].reset_index(drop=True)
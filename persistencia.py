@@ -0,0 +1,230 @@
+import asyncio
+import json
+import logging
+import signal
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+import catalogo
+import grade
+import lacunas
+import markov
+import padroes
+import particoes
+import registro
+import rollups
+
+# ==========================
+# Camada de persistência: todo I/O de disco (CSV, anchor, rollups) roda em threads
+# de I/O, fora do event loop. Cada partição (data, competição) tem seu próprio lock,
+# então workers de competições diferentes não disputam o mesmo arquivo.
+# ==========================
+ROOT = Path(__file__).resolve().parent
+ANCHOR_DIR = ROOT / "anchor_time"
+ANCHOR_DIR.mkdir(exist_ok=True)
+
+log = logging.getLogger("bet")
+
+IO_THREADS = 4
+_executor = ThreadPoolExecutor(max_workers=IO_THREADS, thread_name_prefix="persistencia")
+
+_locks = {}
+_locks_guard = threading.Lock()
+_anchor_lock = threading.Lock()
+
+# Modo multi-processo: escritas vão para o processo escritor por esta fila
+_fila = None
+
+
+async def _run(func, *args):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, func, *args)
+
+
+def _lock_particao(csv_path):
+    with _locks_guard:
+        return _locks.setdefault(csv_path, threading.Lock())
+
+
+# --- Anchor Time ---
+def get_anchor_filename(date=None):
+    return ANCHOR_DIR / f"anchor_time_{(date or datetime.now()).strftime('%Y-%m-%d')}.json"
+
+def _load_anchor_time(comp_name):
+    f = get_anchor_filename()
+    if f.exists():
+        try:
+            with open(f, 'r') as fp:
+                data = json.load(fp)
+                return data.get(comp_name)
+        except: return None
+    return None
+
+def _save_anchor_time(comp_name, time_str, date=None):
+    # date: dia da lista (após a meia-noite o worker ainda drena a lista de ontem)
+    with _anchor_lock:
+        f = get_anchor_filename(date)
+        data = {}
+        if f.exists():
+            try:
+                with open(f, 'r') as fp:
+                    data = json.load(fp)
+            except: pass
+        data[comp_name] = time_str
+        with open(f, 'w') as fp:
+            json.dump(data, fp, indent=4)
+
+
+# --- Resultados ---
+def _save_match_data(comp_name, date_str, hour, minute, ambos_marcam, mercados=None):
+    """
+    Upsert do resultado na partição (data do jogo, competição).
+    `mercados` traz os demais mercados lidos na mesma visita ({coluna: valor}).
+    """
+    data = datetime.strptime(date_str, '%d/%m/%Y')
+    csv_path = particoes.get_partition_path(data, comp_name)
+    csv_path.parent.mkdir(exist_ok=True)
+    with _lock_particao(csv_path):
+        try:
+            # Upsert O(1) na grade de slots do dia (chave: hora * 60 + minuto)
+            grade_dia = grade.GradeDia.ler(csv_path, data, comp_name)
+            # Estado anterior só do Ambos Marcam (cópia de 1440 bytes) para o delta dos rollups
+            grade_anterior = grade.GradeDia(data, comp_name, grade_dia.valores.copy())
+            codigo_anterior = grade_dia.upsert(hour, minute, ambos_marcam, mercados)
+            valor_anterior = grade.VALORES.get(codigo_anterior)
+
+            if codigo_anterior == grade.SEM_JOGO:
+                if ambos_marcam:
+                    log.info(f"     [{comp_name}] 💾 Salvo no CSV: {hour:02d}:{minute:02d} - {ambos_marcam}", extra={"competicao": comp_name})
+                else:
+                    # print(f"     [{comp_name}] 💾 Jogo registrado: {hour:02d}:{minute:02d}")
+                    pass
+
+            # Volta para o esquema CSV, já com os padrões (deslocamentos da grade)
+            df_current = grade_dia.para_dataframe()
+
+            particoes.salvar_csv(df_current, csv_path)
+
+            try:
+                versao = padroes.VERSAO_PADROES if all(p in df_current.columns for p in padroes.COLUNAS_PADROES) else None
+                catalogo.atualizar_particao(data, comp_name, csv_path, df_current, versao)
+            except Exception as e_cat:
+                log.warning(f"     ⚠️ Erro ao atualizar catálogo: {e_cat}", extra={"competicao": comp_name})
+
+            # Rollups por (competição, hora, padrão): atualiza apenas as linhas afetadas
+            # (um jogo novo sem resultado também muda os padrões dele e dos seguintes)
+            if ambos_marcam or codigo_anterior == grade.SEM_JOGO:
+                try:
+                    rollup = rollups.carregar(csv_path)
+                    if rollup is None:
+                        rollup = rollups.construir(df_current)
+                    else:
+                        depois = rollups.valores_afetados(df_current, comp_name, hour, minute)
+                        antes = rollups.valores_da_grade(grade_anterior, [l['slot'] for l in depois])
+                        rollups.aplicar(rollup, comp_name, antes, depois)
+                    rollups.salvar(csv_path, rollup)
+                except Exception as e_roll:
+                    log.warning(f"     ⚠️ Erro ao atualizar rollups: {e_roll}", extra={"competicao": comp_name})
+
+            # Contagens de transição (markov.json): só muda se o resultado for novo
+            if ambos_marcam:
+                try:
+                    markov.registrar_resultado(data, comp_name, hour, minute, valor_anterior, ambos_marcam, df_current)
+                except Exception as e_mk:
+                    log.warning(f"     ⚠️ Erro ao atualizar modelo de transição: {e_mk}", extra={"competicao": comp_name})
+
+            # Publica a nova versão do dia por último: quem vê a versão nova vê CSV e rollup novos
+            particoes.incrementar_versao(data)
+
+        except Exception as e:
+            log.error(f"     [{comp_name}] ❌ Erro ao salvar CSV: {e}", extra={"competicao": comp_name})
+
+def _load_existing_results(comp_name, dates):
+    """
+    Retorna o conjunto "DD/MM/YYYY h:m" dos jogos da competição que já têm resultado
+    nas partições das datas informadas (DD/MM/YYYY).
+    """
+    existing_results = set()
+    for date_str in dates:
+        csv_path = particoes.get_partition_path(datetime.strptime(date_str, '%d/%m/%Y'), comp_name)
+        if not csv_path.exists(): continue
+        try:
+            grade_dia = grade.GradeDia.ler(csv_path, None, comp_name)
+            for s in grade_dia.slots_com_resultado():
+                existing_results.add(f"{date_str} {s // 60}:{s % 60}")
+        except: pass
+    return existing_results
+
+def _detect_gaps(comp_name, dates):
+    """
+    Lacunas da competição nas partições das datas informadas (DD/MM/YYYY), como
+    (date_str, hora, minuto).
+    """
+    gaps = []
+    for date_str in dates:
+        csv_path = particoes.get_partition_path(datetime.strptime(date_str, '%d/%m/%Y'), comp_name)
+        if not csv_path.exists(): continue
+        try:
+            grade_dia = grade.GradeDia.ler(csv_path, None, comp_name)
+            for s in lacunas.detectar(grade_dia.valores):
+                gaps.append((date_str, int(s) // 60, int(s) % 60))
+        except: pass
+    return gaps
+
+
+# --- Processo escritor (modo multi-processo) ---
+def usar_fila(fila):
+    """
+    Direciona as escritas deste processo para `fila`, consumida por processo_escritor.
+    As leituras continuam locais.
+    """
+    global _fila
+    _fila = fila
+
+def processo_escritor(fila):
+    """
+    Único processo que escreve em historico/ e anchor_time/. Encerra ao receber None.
+    Ignora Ctrl+C (o SIGINT chega a todo o grupo de processos): o processo principal
+    envia None depois que os shards terminam, e o escritor drena a fila até lá.
+    """
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    registro.configurar("escritor")
+    while True:
+        msg = fila.get()
+        if msg is None:
+            break
+        tipo, args = msg
+        try:
+            if tipo == "resultado":
+                _save_match_data(*args)
+            elif tipo == "anchor":
+                _save_anchor_time(*args)
+        except Exception as e:
+            log.error(f"❌ Erro no processo escritor ({tipo}): {e}")
+    markov.descarregar()  # o processo filho termina sem rodar atexit
+    registro.encerrar()
+
+
+# --- APIs assíncronas (usadas pelos workers) ---
+async def load_anchor_time(comp_name):
+    return await _run(_load_anchor_time, comp_name)
+
+async def save_anchor_time(comp_name, time_str, date=None):
+    if _fila is not None:
+        _fila.put(("anchor", (comp_name, time_str, date)))
+        return
+    await _run(_save_anchor_time, comp_name, time_str, date)
+
+async def save_match_data(comp_name, date_str, hour, minute, ambos_marcam, mercados=None):
+    if _fila is not None:
+        _fila.put(("resultado", (comp_name, date_str, hour, minute, ambos_marcam, mercados)))
+        return
+    await _run(_save_match_data, comp_name, date_str, hour, minute, ambos_marcam, mercados)
+
+async def load_existing_results(comp_name, dates):
+    return await _run(_load_existing_results, comp_name, dates)
+
+async def detect_gaps(comp_name, dates):
+    return await _run(_detect_gaps, comp_name, dates)
@@ -0,0 +1,160 @@
+import asyncio
+import json
+import re
+import time
+from collections import deque
+
+import mercados
+
+# ==========================
+# Captura de resultados pelas respostas de rede da própria página (opcional,
+# config "CAPTURA_REDE"). Ao abrir um jogo o SPA de resultados já busca os mercados
+# por XHR/fetch; aqui as respostas JSON cuja URL casa com "CAPTURA_REDE_URL" são
+# guardadas e os mercados são lidos do payload, sem clicar no mercado nem ler o DOM
+# linha a linha. Se nada for achado no prazo, o worker volta para a extração pelo DOM.
+#
+# O formato do payload não é fixo: os parsers percorrem o JSON procurando objetos de
+# mercado (título igual ao configurado em mercados.py) com uma lista de seleções em
+# que a vencedora está marcada como "Won". As chaves aceitas estão nas tuplas abaixo.
+# ==========================
+CHAVES_NOME = ("name", "title", "marketName", "market", "label", "NA")
+CHAVES_SELECOES = ("selections", "outcomes", "participants", "variables", "rows", "odds")
+CHAVES_RESULTADO = ("result", "status", "outcome", "value", "state")
+CHAVES_VENCEU = ("won", "isWinner", "winner")
+VENCEU = {"won", "win", "winner"}
+
+CHAVES_HORARIO = ("time", "startTime", "kickoff", "hora")
+HORARIO_RE = re.compile(r"^(\d{1,2})[.:](\d{2})$")
+
+TAMANHO_BUFFER = 50
+
+
+def _nome(obj):
+    for k in CHAVES_NOME:
+        v = obj.get(k)
+        if isinstance(v, str):
+            return v.strip()
+    return None
+
+
+def _venceu(selecao):
+    if any(selecao.get(k) is True for k in CHAVES_VENCEU):
+        return True
+    return any(isinstance(selecao.get(k), str) and selecao[k].strip().lower() in VENCEU for k in CHAVES_RESULTADO)
+
+
+def _objetos(payload):
+    # Percorre todos os dicts do JSON na ordem do documento (iterativo: payloads
+    # grandes não estouram a pilha)
+    pilha = [payload]
+    while pilha:
+        atual = pilha.pop()
+        if isinstance(atual, dict):
+            yield atual
+            pilha.extend(reversed(list(atual.values())))
+        elif isinstance(atual, list):
+            pilha.extend(reversed(atual))
+
+
+def mercados_do_payload(payload, definicoes):
+    """
+    {coluna: valor} dos mercados configurados presentes no payload, no mesmo formato
+    de mercados.extrair (seleções vencedoras unidas por mercados.SEPARADOR).
+    """
+    por_titulo = {d["titulo"]: d["coluna"] for d in definicoes}
+    valores = {}
+    for obj in _objetos(payload):
+        coluna = por_titulo.get(_nome(obj))
+        if coluna is None or coluna in valores:
+            continue
+        selecoes = next((obj[k] for k in CHAVES_SELECOES if isinstance(obj.get(k), list)), None)
+        if not selecoes:
+            continue
+        vencedores = [_nome(s) for s in selecoes if isinstance(s, dict) and _venceu(s) and _nome(s)]
+        if vencedores:
+            valores[coluna] = mercados.SEPARADOR.join(vencedores)
+    if valores.get(mercados.PRINCIPAL) not in (None, "Sim", "Não"):
+        del valores[mercados.PRINCIPAL]
+    return valores
+
+
+def jogos_do_payload(payload):
+    """
+    Horários (hora, minuto) da lista de jogos presentes no payload, sem repetição.
+    """
+    jogos = []
+    for obj in _objetos(payload):
+        for k in CHAVES_HORARIO:
+            v = obj.get(k)
+            if isinstance(v, str):
+                m = HORARIO_RE.match(v.strip())
+                if m and (int(m.group(1)), int(m.group(2))) not in jogos:
+                    jogos.append((int(m.group(1)), int(m.group(2))))
+    return jogos
+
+
+class CapturaRede:
+    """
+    Guarda as últimas respostas JSON da página (com número de sequência). O worker chama
+    marcar() antes de clicar num jogo e mercados(marca, ...) depois: só as respostas
+    chegadas após a marca são consideradas, então um payload atrasado de um jogo
+    anterior nunca é atribuído ao jogo atual.
+    """
+    def __init__(self, padrao_url, tamanho=TAMANHO_BUFFER):
+        self.padrao_url = re.compile(padrao_url)
+        self.respostas = deque(maxlen=tamanho)
+        self.sequencia = 0
+        self.novas = asyncio.Event()
+
+    def anexar(self, page):
+        page.on("response", self._on_response)
+
+    async def _on_response(self, resposta):
+        try:
+            if resposta.request.resource_type not in ("xhr", "fetch") or not self.padrao_url.search(resposta.url):
+                return
+            payload = json.loads(await resposta.text())
+        except Exception:
+            return  # corpo indisponível (página navegou) ou não é JSON
+        self.sequencia += 1
+        self.respostas.append((self.sequencia, payload))
+        self.novas.set()
+
+    def marcar(self):
+        return self.sequencia
+
+    def _ler(self, desde, definicoes):
+        valores = {}
+        for seq, payload in list(self.respostas):
+            if seq > desde:
+                for coluna, valor in mercados_do_payload(payload, definicoes).items():
+                    valores.setdefault(coluna, valor)
+        return valores
+
+    async def mercados(self, desde, definicoes, timeout=3):
+        """
+        Espera (até `timeout` s) uma resposta posterior à marca com o mercado principal.
+        Retorna {coluna: valor} ou {} para o chamador cair no DOM.
+        """
+        limite = time.monotonic() + timeout
+        while True:
+            self.novas.clear()
+            valores = self._ler(desde, definicoes)
+            restante = limite - time.monotonic()
+            if valores.get(mercados.PRINCIPAL) or restante <= 0:
+                return valores if valores.get(mercados.PRINCIPAL) else {}
+            try:
+                await asyncio.wait_for(self.novas.wait(), restante)
+            except asyncio.TimeoutError:
+                pass
+
+    def jogos(self, desde=0):
+        """
+        Horários da lista de jogos da resposta mais recente posterior à marca que tenha algum.
+        """
+        for seq, payload in reversed(list(self.respostas)):
+            if seq > desde:
+                jogos = jogos_do_payload(payload)
+                if jogos:
+                    return jogos
+        return []
@@ -0,0 +1,241 @@
+import contextvars
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import re
+import sys
+import threading
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+
+# ==========================
+# Logs estruturados do scraper. As chamadas de log só colocam o registro numa fila
+# limitada (sem I/O no event loop); uma thread (QueueListener) escreve no console,
+# em logs/<processo>.jsonl (rotativo, uma linha JSON por registro) e num anel em memória.
+# Se a fila encher, o registro é descartado e contado, nunca bloqueia o worker.
+# Processos externos sem este módulo (scraper.js iniciado pelo dashboard) têm a saída de
+# texto redirecionada para logs/<processo>.log (abrir_saida).
+# O dashboard acompanha os arquivos .jsonl e .log com Seguidor.
+# ==========================
+ROOT = Path(__file__).resolve().parent
+LOGS_DIR = ROOT / "logs"
+
+LOG_MAX_BYTES = 5 * 1024 * 1024
+LOG_BACKUPS = 5
+TAMANHO_FILA = 10000
+TAMANHO_ANEL = 2000
+
+NIVEIS = ["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"]
+
+# Linhas de texto (logs/*.log): nível pelo emoji da mensagem, competição pelo "[Nome]"
+_COMPETICAO_RE = re.compile(r"\[([^\]]+)\]")
+
+# Competição do worker atual (cada worker é uma task asyncio com seu próprio contexto)
+competicao_atual = contextvars.ContextVar("competicao", default=None)
+
+anel = deque(maxlen=TAMANHO_ANEL)
+descartados = 0
+
+_listener = None
+_lock = threading.Lock()
+
+
+class _FiltroContexto(logging.Filter):
+    """
+    Preenche processo/competição no registro (roda na thread de quem loga).
+    """
+    def __init__(self, processo):
+        super().__init__()
+        self.processo = processo
+
+    def filter(self, record):
+        record.processo = self.processo
+        if getattr(record, "competicao", None) is None:
+            record.competicao = competicao_atual.get()
+        return True
+
+
+class _FilaSemBloqueio(logging.handlers.QueueHandler):
+    pendentes = 0  # descartados ainda não avisados
+
+    def enqueue(self, record):
+        global descartados
+        try:
+            if self.pendentes:
+                aviso = logging.makeLogRecord({
+                    "name": record.name, "levelno": logging.WARNING, "levelname": "WARNING",
+                    "msg": f"⚠️ {self.pendentes} registros de log descartados (fila cheia)",
+                    "processo": record.processo, "competicao": None,
+                })
+                self.queue.put_nowait(aviso)
+                self.pendentes = 0
+            self.queue.put_nowait(record)
+        except queue.Full:
+            descartados += 1
+            self.pendentes += 1
+
+
+def _como_dict(record):
+    return {
+        "ts": datetime.fromtimestamp(record.created).isoformat(timespec='seconds'),
+        "nivel": record.levelname,
+        "processo": record.processo,
+        "competicao": record.competicao,
+        "msg": record.getMessage(),
+    }
+
+
+class _FormatoJSON(logging.Formatter):
+    def format(self, record):
+        return json.dumps(_como_dict(record), ensure_ascii=False)
+
+
+class _AnelHandler(logging.Handler):
+    def emit(self, record):
+        anel.append(_como_dict(record))
+
+
+def configurar(processo="app", console=True):
+    """
+    Liga o logger "bet" à fila e inicia a thread escritora. Idempotente por processo.
+    """
+    global _listener
+    with _lock:
+        logger = logging.getLogger("bet")
+        if _listener is not None:
+            return logger
+        LOGS_DIR.mkdir(exist_ok=True)
+
+        arquivo = logging.handlers.RotatingFileHandler(
+            LOGS_DIR / f"{processo}.jsonl", maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUPS, encoding="utf-8")
+        arquivo.setFormatter(_FormatoJSON())
+        handlers = [arquivo, _AnelHandler()]
+        if console:
+            tela = logging.StreamHandler(sys.stdout)
+            tela.setFormatter(logging.Formatter("%(message)s"))
+            handlers.append(tela)
+
+        fila = queue.Queue(maxsize=TAMANHO_FILA)
+        handler = _FilaSemBloqueio(fila)
+        handler.addFilter(_FiltroContexto(processo))
+        logger.handlers = [handler]
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+
+        _listener = logging.handlers.QueueListener(fila, *handlers, respect_handler_level=True)
+        _listener.start()
+        return logger
+
+
+def encerrar():
+    """
+    Esvazia a fila e para a thread escritora.
+    """
+    global _listener
+    with _lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
+
+
+def _ordem(nivel):
+    # Níveis desconhecidos (ex: customizados) contam como INFO
+    return NIVEIS.index(nivel) if nivel in NIVEIS else NIVEIS.index("INFO")
+
+
+def filtrar(registros, competicao=None, nivel=None):
+    minimo = NIVEIS.index(nivel) if nivel in NIVEIS else 0
+    return [
+        r for r in registros
+        if (not competicao or r.get("competicao") == competicao)
+        and _ordem(r.get("nivel", "INFO")) >= minimo
+    ]
+
+
+def abrir_saida(processo):
+    """
+    Abre logs/<processo>.log (append, binário) para receber stdout/stderr de um processo
+    externo. O arquivo fica com o processo, então é girado aqui, antes de cada início
+    (com o processo parado), nos mesmos limites dos .jsonl.
+    """
+    LOGS_DIR.mkdir(exist_ok=True)
+    path = LOGS_DIR / f"{processo}.log"
+    if path.exists() and path.stat().st_size >= LOG_MAX_BYTES:
+        for i in range(LOG_BACKUPS - 1, 0, -1):
+            antigo = path.with_name(f"{path.name}.{i}")
+            if antigo.exists():
+                os.replace(antigo, path.with_name(f"{path.name}.{i + 1}"))
+        os.replace(path, path.with_name(f"{path.name}.1"))
+    return open(path, "ab")
+
+
+def de_texto(linha, processo):
+    """
+    Registro no formato dos .jsonl a partir de uma linha de texto (ex: console.log do scraper.js).
+    """
+    nivel = "ERROR" if "❌" in linha else "WARNING" if "⚠️" in linha else "INFO"
+    m = _COMPETICAO_RE.search(linha)
+    return {
+        "ts": datetime.now().isoformat(timespec='seconds'),
+        "nivel": nivel,
+        "processo": processo,
+        "competicao": m.group(1) if m else None,
+        "msg": linha,
+    }
+
+
+class Seguidor:
+    """
+    Acompanha logs/*.jsonl e logs/*.log (de outros processos) guardando os últimos registros
+    num anel. Cada registro recebe um número de sequência para que cada leitor peça só os
+    novos. atualizar() roda numa única thread; desde() pode ser chamado de qualquer uma.
+    """
+    def __init__(self, tamanho=TAMANHO_ANEL):
+        self.registros = deque(maxlen=tamanho)
+        self.sequencia = 0
+        self.posicoes = {}
+        self._lock = threading.Lock()
+
+    def atualizar(self):
+        if not LOGS_DIR.is_dir():
+            return
+        for path in sorted(LOGS_DIR.glob("*.jsonl")) + sorted(LOGS_DIR.glob("*.log")):
+            try:
+                tamanho = path.stat().st_size
+            except FileNotFoundError:
+                continue
+            novo = path not in self.posicoes
+            # Na primeira leitura só pega o final do arquivo
+            posicao = max(tamanho - 256 * 1024, 0) if novo else self.posicoes[path]
+            if tamanho < posicao:
+                posicao = 0  # arquivo rotacionado
+            with open(path, "rb") as fp:
+                fp.seek(posicao)
+                dados = fp.read()
+            fim = dados.rfind(b"\n") + 1  # a última linha pode estar sendo escrita
+            self.posicoes[path] = posicao + fim
+            linhas = dados[:fim].decode("utf-8", errors="replace").splitlines()
+            if novo and posicao:
+                linhas = linhas[1:]  # começou no meio de uma linha
+            novos = []
+            for linha in linhas:
+                if path.suffix == ".log":
+                    if linha.strip():
+                        novos.append(de_texto(linha.rstrip(), path.stem))
+                    continue
+                try:
+                    novos.append(json.loads(linha))
+                except ValueError:
+                    continue
+            with self._lock:
+                for registro in novos:
+                    self.sequencia += 1
+                    registro["seq"] = self.sequencia
+                    self.registros.append(registro)
+
+    def desde(self, seq=0):
+        with self._lock:
+            return [r for r in self.registros if r["seq"] > seq]
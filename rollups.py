@@ -0,0 +1,163 @@
+import json
+from pathlib import Path
+
+import esquema
+import grade
+import particoes
+
+# Colunas agregadas (resultado bruto + padrões)
+COLUNAS = ["Ambos Marcam", "5x", "4x", "3x", "2x", "1x"]
+VALORES = ("Sim", "Não")
+
+# Um resultado salvo altera o próprio padrão e os padrões dos 6 jogos seguintes (shift 2..6)
+JANELA_AFETADA = 7
+
+
+def get_rollup_filename(csv_path):
+    """
+    historico/DD-MM-YYYY/Euro_Cup.csv -> historico/DD-MM-YYYY/Euro_Cup.rollup.json
+    historico/matches_DD-MM-YYYY.csv  -> historico/rollup_DD-MM-YYYY.json (arquivos legados)
+    """
+    csv_path = Path(csv_path)
+    if csv_path.stem.startswith("matches_"):
+        return csv_path.with_name(csv_path.stem.replace("matches_", "rollup_") + ".json")
+    return csv_path.with_suffix(".rollup.json")
+
+
+def carregar(csv_path):
+    f = get_rollup_filename(csv_path)
+    if f.exists():
+        try:
+            with open(f, "r", encoding="utf-8") as fp:
+                return json.load(fp)
+        except: pass
+    return None
+
+
+def salvar(csv_path, dados):
+    def escrever(tmp):
+        with open(tmp, "w", encoding="utf-8") as fp:
+            json.dump(dados, fp, ensure_ascii=False)
+    particoes.publicar(get_rollup_filename(csv_path), escrever)
+
+
+def carregar_dia(date):
+    """
+    Junta os rollups de todas as partições do dia. Retorna None se algum arquivo
+    do dia ainda não tiver rollup (o chamador constrói a partir dos dados).
+    """
+    dados = {}
+    arquivos = particoes.day_files(date)
+    for f in arquivos:
+        parcial = carregar(f)
+        if parcial is None:
+            return None
+        for comp, horas in parcial.items():
+            dados.setdefault(comp, {}).update(horas)
+    return dados if arquivos else None
+
+
+def _celula(dados, comp, hora):
+    hora_dict = dados.setdefault(comp, {})
+    celula = hora_dict.get(hora)
+    if celula is None:
+        celula = {c: {v: 0 for v in VALORES} for c in COLUNAS}
+        hora_dict[hora] = celula
+    return celula
+
+
+def _somar(dados, comp, valores_linha, sinal):
+    hora, _minuto = valores_linha["slot"]
+    celula = _celula(dados, comp, str(hora))
+    for c in COLUNAS:
+        v = valores_linha.get(c)
+        if v in VALORES:
+            celula[c][v] += sinal
+
+
+def valores_afetados(df, comp, hora, minuto):
+    """
+    Retorna os valores (Ambos Marcam + padrões) do jogo salvo e dos JANELA_AFETADA-1 jogos
+    seguintes da mesma competição, que são os únicos cujos contadores podem mudar.
+    """
+    if df is None or df.empty:
+        return []
+    df_comp = df[df['Competição'] == comp]
+    horas = esquema.inteiro(df_comp['Hora'])
+    minutos = esquema.inteiro(df_comp['Minuto'])
+    slots_df = horas * 60 + minutos
+    alvo = int(hora) * 60 + int(minuto)
+    posicoes = slots_df[slots_df >= alvo].sort_values().index[:JANELA_AFETADA]
+
+    linhas = []
+    for idx in posicoes:
+        linha = {"slot": (int(horas[idx]), int(minutos[idx]))}
+        for c in COLUNAS:
+            if c in df_comp.columns:
+                linha[c] = df_comp.at[idx, c]
+        linhas.append(linha)
+    return linhas
+
+
+def valores_da_grade(grade_dia, slots):
+    """
+    Mesmo formato de valores_afetados, lido direto da grade (sem montar o DataFrame),
+    para os (hora, minuto) informados que têm jogo. Usado para o estado anterior ao upsert.
+    """
+    arrays = {"Ambos Marcam": grade_dia.valores, **grade_dia.padroes()}
+    linhas = []
+    for hora, minuto in slots:
+        s = grade.slot(hora, minuto)
+        if grade_dia.valores[s] == grade.SEM_JOGO:
+            continue
+        linha = {"slot": (hora, minuto)}
+        for c in COLUNAS:
+            linha[c] = grade.VALORES.get(int(arrays[c][s]))
+        linhas.append(linha)
+    return linhas
+
+
+def aplicar(dados, comp, antes, depois):
+    """
+    Atualiza os contadores de forma incremental: remove a contribuição antiga das linhas
+    afetadas e soma a nova. Custo limitado a JANELA_AFETADA linhas.
+    `antes` deve cobrir os mesmos slots de `depois` (ver valores_da_grade).
+    """
+    for linha in antes:
+        _somar(dados, comp, linha, -1)
+    for linha in depois:
+        _somar(dados, comp, linha, +1)
+    return dados
+
+
+def construir(df):
+    """
+    Constrói os contadores do zero a partir de um DataFrame já processado por calcular_padroes.
+    Usado para dias sem arquivo de rollup ou para reconstrução.
+    """
+    dados = {}
+    if df is None or df.empty:
+        return dados
+    horas = esquema.inteiro(df['Hora'])
+    for (comp, hora), grupo in df.groupby([df['Competição'], horas], observed=True):
+        celula = _celula(dados, comp, str(hora))
+        for c in COLUNAS:
+            if c in grupo.columns:
+                contagem = grupo[c].value_counts()
+                for v in VALORES:
+                    celula[c][v] = int(contagem.get(v, 0))
+    return dados
+
+
+def taxa_sim(dados, comp, hora, coluna):
+    """
+    Retorna (sim, total) para a hora; hora=None agrega o dia inteiro.
+    """
+    horas = dados.get(comp, {})
+    celulas = horas.values() if hora is None else [horas.get(str(hora))]
+    sim = total = 0
+    for celula in celulas:
+        if not celula or coluna not in celula: continue
+        sim += celula[coluna]["Sim"]
+        total += celula[coluna]["Sim"] + celula[coluna]["Não"]
+    return sim, total
@@ -0,0 +1,128 @@
+import json
+import sys
+from html.parser import HTMLParser
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+FIXTURES = Path(__file__).resolve().parent / "fixtures"
+
+# Os módulos do scraper ficam na raiz do repositório
+sys.path.insert(0, str(ROOT))
+
+import mercados  # noqa: E402
+
+
+def carregar_json(nome):
+    with open(FIXTURES / nome, "r", encoding="utf-8") as fp:
+        return json.load(fp)
+
+
+# ==========================
+# Página falsa a partir de um snapshot HTML do painel de resultado. Responde aos scripts
+# de mercados.py (abrir, pronto, ler) com a mesma semântica do JS, para exercitar
+# mercados.extrair sem browser. Os testes com browser (test_mercados.py) rodam o JS de
+# verdade no mesmo snapshot quando o Chromium do Playwright está instalado.
+# ==========================
+class No:
+    def __init__(self, tag, classes, pai=None):
+        self.tag = tag
+        self.classes = classes
+        self.pai = pai
+        self.filhos = []
+        self.textos = []
+
+    def texto(self):
+        # innerText aproximado: um bloco por linha
+        partes = [t for t in self.textos if t]
+        for filho in self.filhos:
+            t = filho.texto()
+            if t:
+                partes.append(t)
+        return "\n".join(partes)
+
+    def descendentes(self):
+        for filho in self.filhos:
+            yield filho
+            yield from filho.descendentes()
+
+    def primeiro(self, tag=None, classe=None):
+        return next((n for n in self.descendentes()
+                     if (tag is None or n.tag == tag) and (classe is None or classe in n.classes)), None)
+
+    def todos(self, classe):
+        return [n for n in self.descendentes() if classe in n.classes]
+
+
+class _Parser(HTMLParser):
+    VAZIAS = {"meta", "br", "img", "input", "link"}
+
+    def __init__(self):
+        super().__init__()
+        self.raiz = No("document", set())
+        self.atual = self.raiz
+
+    def handle_starttag(self, tag, attrs):
+        no = No(tag, set((dict(attrs).get("class") or "").split()), self.atual)
+        self.atual.filhos.append(no)
+        if tag not in self.VAZIAS:
+            self.atual = no
+
+    def handle_endtag(self, tag):
+        if tag not in self.VAZIAS and self.atual.pai is not None:
+            self.atual = self.atual.pai
+
+    def handle_data(self, data):
+        self.atual.textos.append(data.strip())
+
+
+class PainelFalso:
+    def __init__(self, html):
+        parser = _Parser()
+        parser.feed(html)
+        self.raiz = parser.raiz
+        self.avaliacoes = 0
+
+    def _itens(self):
+        # '.market-search__link-wrapper > div'
+        for wrapper in self.raiz.todos("market-search__link-wrapper"):
+            for item in wrapper.filhos:
+                if item.tag == "div":
+                    btn = item.primeiro("button")
+                    if btn is not None:
+                        yield item, btn.texto().split("\n")[0].strip()
+
+    async def evaluate(self, script, titulos):
+        self.avaliacoes += 1
+        if script == mercados._JS_ABRIR:
+            return [titulo for _, titulo in self._itens() if titulo in titulos]
+        if script == mercados._JS_LER:
+            lidos = {}
+            for item, titulo in self._itens():
+                if titulo not in titulos:
+                    continue
+                vencedores = []
+                for row in item.todos("market-search__link-variables-row"):
+                    nome = row.primeiro(classe="market-search__link-variables-name")
+                    valor = row.primeiro(classe="market-search__link-variables-value")
+                    if nome and valor and valor.texto().strip() == "Won":
+                        vencedores.append(nome.texto().strip())
+                lidos[titulo] = vencedores
+            return lidos
+        raise AssertionError("script inesperado")
+
+    async def wait_for_function(self, script, arg=None, timeout=None):
+        assert script == mercados._JS_PRONTO
+        self.avaliacoes += 1
+        for item, titulo in self._itens():
+            if titulo in arg and not item.todos("market-search__link-variables-row"):
+                raise TimeoutError("mercado sem seleções")
+        return True
+
+
+@pytest.fixture
+def painel():
+    def abrir(nome):
+        return PainelFalso((FIXTURES / nome).read_text(encoding="utf-8"))
+    return abrir
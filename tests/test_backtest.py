@@ -0,0 +1,35 @@
+import numpy as np
+import pandas as pd
+
+import backtest
+
+
+def _dados(n=5000):
+    rng = np.random.default_rng(0)
+    return {
+        "colunas": {c: rng.integers(-1, 2, n).astype(np.int8) for c in backtest.COLUNAS},
+        "competicao": rng.integers(0, 2, n).astype(np.int16),
+        "competicoes": ["Euro Cup", "Premier League"],
+    }
+
+
+def test_grade_pequena_roda_no_processo(monkeypatch):
+    def nao_criar():
+        raise AssertionError("pool não deveria ser criado")
+    monkeypatch.setattr(backtest, "_obter_pool", nao_criar)
+    df = backtest.executar(_dados(), backtest.gerar_grade(), processos=4)
+    assert len(df) == 20 * 3  # regras × (Todas + 2 competições)
+
+
+def test_pool_da_o_mesmo_resultado_e_e_reaproveitado(monkeypatch):
+    monkeypatch.setattr(backtest, "PARALELO_MIN", 0)
+    dados, grade = _dados(), backtest.gerar_grade(tuple(backtest.COLUNAS))
+    serial = backtest.executar(dados, grade, processos=1)
+    try:
+        paralelo = backtest.executar(dados, grade, processos=2)
+        pool = backtest._pool
+        backtest.executar(dados, grade, processos=2)
+        assert backtest._pool is pool
+    finally:
+        backtest._descartar_pool()
+    pd.testing.assert_frame_equal(serial.reset_index(drop=True), paralelo.reset_index(drop=True))
@@ -0,0 +1,66 @@
+import json
+from datetime import datetime
+
+import pandas as pd
+import pytest
+
+import markov
+import particoes
+
+HOJE = datetime(2026, 1, 1)
+
+
+@pytest.fixture
+def modelo_vazio(tmp_path, monkeypatch):
+    monkeypatch.setattr(markov, "MODELO_PATH", tmp_path / "markov.json")
+    monkeypatch.setattr(markov, "SALVAR_A_CADA", 3)
+    monkeypatch.setattr(markov, "SALVAR_INTERVALO", 60.0)
+    monkeypatch.setattr(markov, "_cache", None)
+    monkeypatch.setattr(markov, "_pendente", None)
+    monkeypatch.setattr(markov, "_n_pendentes", 0)
+    markov._salvar(markov._vazio())
+    yield markov.MODELO_PATH
+    markov._cancelar_timer()
+
+
+def _registrar(minuto, valor="Sim"):
+    df = pd.DataFrame({"Competição": ["Euro Cup"], "Hora": [10], "Minuto": [minuto], "Ambos Marcam": [valor]})
+    markov.registrar_resultado(HOJE, "Euro Cup", 10, minuto, None, valor, df)
+
+
+def _contagem_gravada(path):
+    with open(path, encoding="utf-8") as fp:
+        modelo = json.load(fp)
+    return modelo["contagens"].get("Euro Cup", {}).get(markov.TODAS_HORAS, {}).get("", [0, 0])
+
+
+def test_grava_a_cada_n_resultados(modelo_vazio):
+    _registrar(0)
+    _registrar(3)
+    assert _contagem_gravada(modelo_vazio) == [0, 0]
+    assert markov.carregar()["contagens"] == {}  # o modelo em cache não é alterado
+    _registrar(6)
+    assert _contagem_gravada(modelo_vazio) == [3, 0]
+    assert markov._pendente is None
+
+
+def test_descarregar_grava_pendentes(modelo_vazio):
+    _registrar(0, "Não")
+    markov.descarregar()
+    assert _contagem_gravada(modelo_vazio) == [0, 1]
+
+
+def test_falha_na_gravacao_mantem_pendentes_e_o_cache(modelo_vazio, monkeypatch):
+    publicar = particoes.publicar
+
+    def falhar(path, escrever):
+        raise OSError("disco cheio")
+    monkeypatch.setattr(particoes, "publicar", falhar)
+    for minuto in (0, 3, 6):
+        _registrar(minuto)
+    assert markov.carregar()["contagens"] == {}
+    assert markov._n_pendentes == 3
+
+    monkeypatch.setattr(particoes, "publicar", publicar)
+    markov.descarregar()
+    assert _contagem_gravada(modelo_vazio) == [3, 0]
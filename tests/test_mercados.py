@@ -0,0 +1,108 @@
+import asyncio
+
+import pytest
+
+import mercados
+from conftest import FIXTURES
+
+DEFINICOES = mercados.normalizar([
+    "Ambos Marcam",
+    "Resultado Correto",
+    {"coluna": "Gols +/-", "titulo": "Total de Gols"},
+])
+
+
+def test_normalizar_principal_primeiro_e_sem_repeticao():
+    definicoes = mercados.normalizar(["Resultado Correto", "Resultado Correto", {"coluna": "Gols", "titulo": "Total de Gols"}])
+    assert mercados.colunas(definicoes) == ["Ambos Marcam", "Resultado Correto", "Gols"]
+    assert definicoes[2]["titulo"] == "Total de Gols"
+
+
+def test_extrair_painel(painel):
+    page = painel("painel_resultado.html")
+    valores, encontrados = asyncio.run(mercados.extrair(page, DEFINICOES))
+    # Total de Gols está fechado no snapshot: achado no painel, mas sem seleções
+    assert valores == {"Ambos Marcam": "Sim", "Resultado Correto": "2-1"}
+    assert encontrados == ["Ambos Marcam", "Resultado Correto", "Gols +/-"]
+    # abrir + esperar + ler, independente do número de mercados
+    assert page.avaliacoes == 3
+
+
+def test_extrair_sem_titulo_nao_encontra_principal(painel):
+    valores, encontrados = asyncio.run(mercados.extrair(painel("painel_sem_titulo.html"), DEFINICOES))
+    assert valores == {}
+    assert mercados.PRINCIPAL not in encontrados
+
+
+def test_extrair_erro_do_browser():
+    class PaginaFechada:
+        async def evaluate(self, *args):
+            raise RuntimeError("Target page, context or browser has been closed")
+    assert asyncio.run(mercados.extrair(PaginaFechada(), DEFINICOES)) == ({}, [])
+
+
+# --- Fallback para a extração antiga (app.extract_ambos_marcam_logic) ---
+@pytest.fixture
+def app(monkeypatch):
+    pytest.importorskip("playwright")
+    import app
+    monkeypatch.setattr(app.metricas, "registrar_evento", lambda *args, **kwargs: None)
+    monkeypatch.setattr(app, "MERCADOS", DEFINICOES)
+    return app
+
+
+def test_extrair_resultado_usa_painel_sem_fallback(app, painel, monkeypatch):
+    async def nao_chamar(page):
+        raise AssertionError("fallback não deveria ser chamado")
+    monkeypatch.setattr(app, "extract_ambos_marcam_logic", nao_chamar)
+    valores = asyncio.run(app.extrair_resultado(painel("painel_resultado.html")))
+    assert valores == {"Ambos Marcam": "Sim", "Resultado Correto": "2-1"}
+
+
+def test_extrair_resultado_cai_na_extracao_antiga(app, painel, monkeypatch):
+    chamadas = []
+
+    async def antiga(page):
+        chamadas.append(page)
+        return "Não"
+    monkeypatch.setattr(app, "extract_ambos_marcam_logic", antiga)
+    page = painel("painel_sem_titulo.html")
+    assert asyncio.run(app.extrair_resultado(page)) == {"Ambos Marcam": "Não"}
+    assert chamadas == [page]
+
+
+def test_extrair_resultado_rede_antes_do_dom(app, painel, monkeypatch):
+    class CapturaFalsa:
+        async def mercados(self, desde, definicoes, timeout):
+            assert desde == 7
+            return {"Ambos Marcam": "Não"}
+    page = painel("painel_resultado.html")
+    assert asyncio.run(app.extrair_resultado(page, CapturaFalsa(), 7)) == {"Ambos Marcam": "Não"}
+    assert page.avaliacoes == 0
+
+
+# --- Mesmos snapshots no Chromium (JS real); pulados se o browser não estiver instalado ---
+async def _no_browser(nome, funcao):
+    from playwright.async_api import async_playwright
+    async with async_playwright() as p:
+        try:
+            browser = await p.chromium.launch()
+        except Exception as e:
+            pytest.skip(f"Chromium do Playwright indisponível: {e}")
+        try:
+            page = await browser.new_page()
+            await page.set_content((FIXTURES / nome).read_text(encoding="utf-8"))
+            return await funcao(page)
+        finally:
+            await browser.close()
+
+
+def test_extrair_painel_no_browser():
+    pytest.importorskip("playwright")
+    valores, encontrados = asyncio.run(_no_browser("painel_resultado.html", lambda page: mercados.extrair(page, DEFINICOES, timeout=1)))
+    assert valores == {"Ambos Marcam": "Sim", "Resultado Correto": "2-1"}
+    assert encontrados == ["Ambos Marcam", "Resultado Correto", "Gols +/-"]
+
+
+def test_extracao_antiga_no_browser(app):
+    assert asyncio.run(_no_browser("painel_sem_titulo.html", app.extrair_resultado)) == {"Ambos Marcam": "Não"}
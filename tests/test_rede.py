@@ -0,0 +1,110 @@
+import asyncio
+import json
+
+import mercados
+import rede
+from conftest import carregar_json
+
+DEFINICOES = mercados.normalizar([
+    "Ambos Marcam",
+    "Resultado Correto",
+    {"coluna": "Gols +/-", "titulo": "Total de Gols"},
+])
+
+
+class RespostaFalsa:
+    def __init__(self, payload, url="https://extra.bet365.bet.br/results/api/result?id=1", tipo="xhr"):
+        self.url = url
+        self.request = type("Requisicao", (), {"resource_type": tipo})()
+        self._payload = payload
+
+    async def text(self):
+        return self._payload if isinstance(self._payload, str) else json.dumps(self._payload)
+
+
+def test_mercados_do_payload_selections():
+    valores = rede.mercados_do_payload(carregar_json("rede_mercados.json"), DEFINICOES)
+    assert valores == {"Ambos Marcam": "Sim", "Resultado Correto": "2-1", "Gols +/-": "Mais de 2.5"}
+
+
+def test_mercados_do_payload_outcomes():
+    valores = rede.mercados_do_payload(carregar_json("rede_mercados_outcomes.json"), DEFINICOES)
+    assert valores == {"Ambos Marcam": "Não", "Resultado Correto": "1-0"}
+
+
+def test_mercados_do_payload_sem_vencedor():
+    assert rede.mercados_do_payload(carregar_json("rede_mercados_pendente.json"), DEFINICOES) == {}
+
+
+def test_mercados_do_payload_principal_invalido():
+    payload = {"markets": [{"name": "Ambos Marcam", "selections": [{"name": "Talvez", "result": "Won"}]}]}
+    assert rede.mercados_do_payload(payload, DEFINICOES) == {}
+
+
+def test_jogos_do_payload_ordem_e_repeticao():
+    jogos = rede.jogos_do_payload(carregar_json("rede_jogos.json"))
+    assert jogos == [(9, 57), (10, 0), (10, 3), (10, 6), (10, 9)]
+
+
+def test_jogos_do_payload_sem_horarios():
+    assert rede.jogos_do_payload(carregar_json("rede_mercados_outcomes.json")) == []
+
+
+def test_captura_filtra_url_tipo_e_json():
+    async def cenario():
+        captura = rede.CapturaRede("result")
+        await captura._on_response(RespostaFalsa(carregar_json("rede_mercados.json"), url="https://x/static/app.js"))
+        await captura._on_response(RespostaFalsa(carregar_json("rede_mercados.json"), tipo="document"))
+        await captura._on_response(RespostaFalsa("<html>não é json</html>"))
+        assert captura.marcar() == 0
+        await captura._on_response(RespostaFalsa(carregar_json("rede_mercados.json")))
+        assert captura.marcar() == 1
+    asyncio.run(cenario())
+
+
+def test_captura_payload_atrasado_nao_vai_para_o_proximo_jogo():
+    async def cenario():
+        captura = rede.CapturaRede("result")
+
+        # Jogo 1: a resposta não chega no prazo, o worker cai no DOM
+        marca1 = captura.marcar()
+        assert await captura.mercados(marca1, DEFINICOES, timeout=0.05) == {}
+
+        # A resposta do jogo 1 chega atrasada, antes do clique no jogo 2
+        await captura._on_response(RespostaFalsa(carregar_json("rede_mercados.json")))
+
+        # Jogo 2: a resposta atrasada é anterior à marca e não pode ser usada
+        marca2 = captura.marcar()
+        assert await captura.mercados(marca2, DEFINICOES, timeout=0.05) == {}
+
+        # Jogo 3: só a resposta chegada depois da marca vale
+        marca3 = captura.marcar()
+        espera = asyncio.create_task(captura.mercados(marca3, DEFINICOES, timeout=2))
+        await asyncio.sleep(0.01)
+        await captura._on_response(RespostaFalsa(carregar_json("rede_mercados_outcomes.json")))
+        assert await espera == {"Ambos Marcam": "Não", "Resultado Correto": "1-0"}
+    asyncio.run(cenario())
+
+
+def test_captura_ignora_resposta_sem_resultado_e_espera_a_seguinte():
+    async def cenario():
+        captura = rede.CapturaRede("result")
+        marca = captura.marcar()
+        espera = asyncio.create_task(captura.mercados(marca, DEFINICOES, timeout=2))
+        await captura._on_response(RespostaFalsa(carregar_json("rede_mercados_pendente.json")))
+        await asyncio.sleep(0.01)
+        assert not espera.done()
+        await captura._on_response(RespostaFalsa(carregar_json("rede_mercados.json")))
+        assert (await espera)["Ambos Marcam"] == "Sim"
+    asyncio.run(cenario())
+
+
+def test_captura_jogos_da_resposta_mais_recente():
+    async def cenario():
+        captura = rede.CapturaRede("result")
+        await captura._on_response(RespostaFalsa(carregar_json("rede_jogos.json")))
+        marca = captura.marcar()
+        await captura._on_response(RespostaFalsa(carregar_json("rede_mercados_outcomes.json")))
+        assert captura.jogos() == [(9, 57), (10, 0), (10, 3), (10, 6), (10, 9)]
+        assert captura.jogos(marca) == []
+    asyncio.run(cenario())
@@ -0,0 +1,86 @@
+import asyncio
+
+import pytest
+
+
+class PaginaFalsa:
+    """
+    Página que mostra `visivel` (um seletor ou None) depois de `atraso` segundos.
+    """
+    def __init__(self, visivel, atraso=0.0):
+        self.visivel = visivel
+        self.atraso = atraso
+        self.fechada = False
+
+    async def goto(self, url, **kwargs):
+        self.inicio = asyncio.get_running_loop().time()
+
+    def _mostra(self, seletor):
+        pronto = asyncio.get_running_loop().time() - self.inicio >= self.atraso
+        return pronto and self.visivel is not None and self.visivel in seletor
+
+    def locator(self, seletor):
+        pagina = self
+
+        class Localizador:
+            first = None
+
+            async def wait_for(self, state, timeout):
+                limite = asyncio.get_running_loop().time() + timeout / 1000
+                while not pagina._mostra(seletor):
+                    if asyncio.get_running_loop().time() >= limite:
+                        raise TimeoutError(seletor)
+                    await asyncio.sleep(0.01)
+
+        loc = Localizador()
+        loc.first = loc
+        return loc
+
+    async def is_visible(self, seletor):
+        return self._mostra(seletor)
+
+    async def close(self):
+        self.fechada = True
+
+
+class ContextoFalso:
+    def __init__(self, pagina):
+        self.pagina = pagina
+
+    async def new_page(self):
+        return self.pagina
+
+
+@pytest.fixture
+def app(monkeypatch):
+    pytest.importorskip("playwright")
+    import app
+    monkeypatch.setattr(app, "SESSION_CHECK_TIMEOUT", 0.5)
+    return app
+
+
+def _validar(app, pagina):
+    async def cenario():
+        inicio = asyncio.get_running_loop().time()
+        valida = await app.sessao_valida(ContextoFalso(pagina))
+        return valida, asyncio.get_running_loop().time() - inicio
+    return asyncio.run(cenario())
+
+
+def test_sessao_logada_decide_sem_esperar_o_prazo(app):
+    pagina = PaginaFalsa(app.LOGGED_IN_SELECTOR, atraso=0.05)
+    valida, duracao = _validar(app, pagina)
+    assert valida
+    assert duracao < 0.4
+    assert pagina.fechada
+
+
+def test_botao_de_login_invalida_a_sessao(app):
+    valida, duracao = _validar(app, PaginaFalsa(app.LOGIN_BTN_SELECTOR, atraso=0.05))
+    assert not valida
+    assert duracao < 0.4
+
+
+def test_pagina_lenta_nao_vale_como_sessao_valida(app):
+    valida, _ = _validar(app, PaginaFalsa(None))
+    assert not valida